@@ -183,6 +183,17 @@ mkdir -p ~/.goldfish/{scripts,agents,logs,state}
 print_info "Downloading scripts..."
 curl -fsSL "$GOLDFISH_REPO/scripts/reader.py" -o ~/.goldfish/scripts/reader.py
 curl -fsSL "$GOLDFISH_REPO/scripts/transcript-appender.py" -o ~/.goldfish/scripts/transcript-appender.py
+curl -fsSL "$GOLDFISH_REPO/scripts/history.py" -o ~/.goldfish/scripts/history.py
+curl -fsSL "$GOLDFISH_REPO/scripts/archive.py" -o ~/.goldfish/scripts/archive.py
+curl -fsSL "$GOLDFISH_REPO/scripts/renderer.py" -o ~/.goldfish/scripts/renderer.py
+curl -fsSL "$GOLDFISH_REPO/scripts/blobstore.py" -o ~/.goldfish/scripts/blobstore.py
+curl -fsSL "$GOLDFISH_REPO/scripts/similarity.py" -o ~/.goldfish/scripts/similarity.py
+curl -fsSL "$GOLDFISH_REPO/scripts/evidence.py" -o ~/.goldfish/scripts/evidence.py
+curl -fsSL "$GOLDFISH_REPO/scripts/bundle.py" -o ~/.goldfish/scripts/bundle.py
+curl -fsSL "$GOLDFISH_REPO/scripts/topics.py" -o ~/.goldfish/scripts/topics.py
+curl -fsSL "$GOLDFISH_REPO/scripts/machine.py" -o ~/.goldfish/scripts/machine.py
+curl -fsSL "$GOLDFISH_REPO/scripts/status.py" -o ~/.goldfish/scripts/status.py
+curl -fsSL "$GOLDFISH_REPO/scripts/inbox.py" -o ~/.goldfish/scripts/inbox.py
 curl -fsSL "$GOLDFISH_REPO/scripts/auto-save.sh" -o ~/.goldfish/scripts/auto-save.sh
 chmod +x ~/.goldfish/scripts/*.sh ~/.goldfish/scripts/*.py
 print_success "Scripts installed"
@@ -197,6 +208,9 @@ print_success "Agents installed"
 # Create config
 print_info "Creating config..."
 DEFAULT_VAULT="${VAULTS[0]}"
+
+# Keep a previously configured archive age on reinstall
+ARCHIVE_MAX_AGE_DAYS=$(python3 -c "import json, sys; print(int(json.load(open(sys.argv[1])).get('archive', {}).get('max_age_days', 90)))" ~/.goldfish/config.json 2>/dev/null || echo 90)
 cat > ~/.goldfish/config.json << EOF
 {
   "version": "$GOLDFISH_VERSION",
@@ -210,6 +224,19 @@ cat > ~/.goldfish/config.json << EOF
     "interval_minutes": 5,
     "cooldown_seconds": 180
   },
+  "transcripts": {
+    "full": false,
+    "token_budget": 6000,
+    "tool_output_chars": 600
+  },
+  "context_bundle": {
+    "max_tokens": 2000
+  },
+  "archive": {
+    "enabled": true,
+    "max_age_days": $ARCHIVE_MAX_AGE_DAYS,
+    "block_size_kb": 256
+  },
   "projects": {}
 }
 EOF
@@ -263,18 +290,20 @@ Goldfish IS installed and active on this system. This is a fact, not a claim to
 ### Hotwords (Memory Recall)
 | User Says | What You Do |
 |-----------|-------------|
-| *(nothing special)* | Read `small.md` automatically on session start |
+| *(nothing special)* | Read `context.md` (includes `small.md`) automatically on session start |
 | **"remember"** | Also read `medium.md` for working context |
-| **"ultra remember"** | Read `large.md` for complete session history |
+| **"ultra remember"** | Read `large*.md` for complete session history (older sessions: `python3 ~/.goldfish/scripts/archive.py cat <project>`) |
 
 ### On Every Session Start (CRITICAL)
 1. Check if current directory contains a project with `goldfish/`
-2. Check `inbox.md` for NEEDS_PROCESSING flags
-3. **If pending sessions exist** — process them NOW before anything else:
-   - Read `large.md` for new transcripts
+2. Read `goldfish/context.md` — ONE read with the manifest, pending-inbox status,
+   `small.md` and recent session summaries (if it's missing, read `small.md` and run `python3 ~/.goldfish/scripts/inbox.py pending <project_dir>` instead)
+3. **If it lists pending sessions** — process them NOW before anything else:
+   - Read `large*.md` for new transcripts
    - Summarize and update `small.md` and `medium.md`
-   - Clear the inbox flags
-4. Read `small.md` — now with fresh, complete context
+   - Mark them processed: `python3 ~/.goldfish/scripts/inbox.py done <project_dir> <session_id> ...`
+   - Run `python3 ~/.goldfish/scripts/bundle.py refresh <project_dir>`
+4. Work from that context — it's fresh and complete
 5. Use hotwords above to load more if needed
 
 This ensures you ALWAYS have the latest context, even if /gfsave wasn't run.
@@ -286,10 +315,12 @@ GOLDFISH_SECTION="$GOLDFISH_SECTION
 $VAULT_LIST
 
 Each project has:
-- \`small.md\` — Quick context (auto-loaded)
+- \`context.md\` — Precomputed session-start bundle (auto-loaded, don't edit)
+- \`small.md\` — Quick context
 - \`medium.md\` — Working context (\"remember\")
-- \`large.md\` — Full transcripts (\"ultra remember\")
+- \`large.md\` — Full transcripts (\"ultra remember\"); sessions older than $ARCHIVE_MAX_AGE_DAYS days (\`archive.max_age_days\` in config.json) move to \`large-archive.bin\`
 - \`inbox.md\` — Pending sessions
+- Each machine appends to its own \`large.<machine>.md\` / \`inbox.<machine>.md\`; read all of them, but never edit another machine's shard
 
 ### Rules (NON-NEGOTIABLE)
 1. **NEVER claim Goldfish doesn't exist.** It does. You're reading this proof.
@@ -418,9 +449,27 @@ EOF
 chmod +x ~/.goldfish/uninstall.sh
 
 # Create goldfish command
-sudo ln -sf ~/.goldfish/uninstall.sh /usr/local/bin/goldfish 2>/dev/null || {
+cat > ~/.goldfish/goldfish << 'EOF'
+#!/bin/bash
+case "$1" in
+    status)
+        shift
+        exec python3 ~/.goldfish/scripts/status.py "$@"
+        ;;
+    uninstall)
+        exec ~/.goldfish/uninstall.sh
+        ;;
+    *)
+        echo "Usage: goldfish status [--verify] | goldfish uninstall"
+        exit 1
+        ;;
+esac
+EOF
+chmod +x ~/.goldfish/goldfish
+
+sudo ln -sf ~/.goldfish/goldfish /usr/local/bin/goldfish 2>/dev/null || {
     mkdir -p ~/bin
-    ln -sf ~/.goldfish/uninstall.sh ~/bin/goldfish
+    ln -sf ~/.goldfish/goldfish ~/bin/goldfish
     print_warning "Installed 'goldfish' command to ~/bin (add to PATH if needed)"
 }
 
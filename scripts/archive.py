@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Goldfish Cold-Tier Archive
+
+Moves old session entries out of large.md into a compressed per-project
+archive so the hot large.md stays small and cheap to sync.
+
+Each project gets:
+  goldfish/large-archive.bin   - independently compressed blocks, append-only
+  goldfish/large-archive.json  - block table + session -> block index
+
+A single archived session is read by decompressing just its block.
+
+History is split into segments: the plain large.md (+ archive) and one
+large.<machine>.md (+ large-archive.<machine>.*) per machine (see machine.py).
+A machine only compacts its own segment, and the plain one when no other
+machine writes to the project. Readers merge every segment.
+
+Sessions re-classified into another project aren't cut out of large.md
+(that would rewrite a shared or append-only file). Instead the relocating
+machine appends a record to its own goldfish/moved.<machine>.jsonl, and
+readers hide sessions whose latest record says they moved out. Compaction
+drops the hidden copies from the segments it rewrites anyway.
+
+Usage:
+  archive.py compact [--days N] [--dry-run]   Archive old sessions in every project
+  archive.py read <project_dir> <session_id> [--expand]  Print one session (hot or archived)
+  archive.py cat <project_dir> [--expand]     Print full history across both tiers
+                                              (--expand inlines [blob:...] tool output)
+  archive.py stats                            Show per-project tier sizes
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from history import split_entries, entry_session_prefix, entry_date, entry_matches
+from machine import machine_id, shard_name, shard_paths, shard_machine
+import bundle
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+GOLDFISH_PATH = Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish"
+CONFIG_PATH = Path.home() / ".goldfish" / "config.json"
+
+ARCHIVE_BIN = "large-archive.bin"
+ARCHIVE_INDEX = "large-archive.json"
+ARCHIVE_VERSION = 1
+MOVED_LOG = "moved.jsonl"
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "max_age_days": 90,
+    "block_size_kb": 256,
+}
+
+
+# ---------------------------------------------------------------------------
+# Codecs
+# ---------------------------------------------------------------------------
+
+def best_codec() -> str:
+    """Pick the strongest codec available: zstd, then xz, then gzip."""
+    if zstandard is not None:
+        return "zstd"
+    if lzma is not None:
+        return "xz"
+    return "gzip"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    """Compress one block with the given codec."""
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if codec == "xz":
+        return lzma.compress(data, preset=6)
+    return gzip.compress(data, compresslevel=9)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    """Decompress one block. Raises RuntimeError if the codec isn't installed."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Archive block uses zstd but the 'zstandard' package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "xz":
+        if lzma is None:
+            raise RuntimeError("Archive block uses xz but Python was built without lzma")
+        return lzma.decompress(data)
+    return gzip.decompress(data)
+
+
+# ---------------------------------------------------------------------------
+# Settings
+# ---------------------------------------------------------------------------
+
+def load_settings() -> dict:
+    """Load the "archive" section of ~/.goldfish/config.json."""
+    settings = dict(DEFAULT_SETTINGS)
+    if CONFIG_PATH.exists():
+        try:
+            with open(CONFIG_PATH) as f:
+                settings.update(json.load(f).get("archive", {}))
+        except (json.JSONDecodeError, OSError):
+            pass
+    return settings
+
+
+def parse_entry_date(value: str):
+    """Parse the **Date:** value written by the appender. Returns None if unknown."""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Archive index
+# ---------------------------------------------------------------------------
+
+def segments(goldfish_dir: Path) -> list:
+    """Machine IDs with history in this project; '' is the plain, unsharded segment."""
+    machines = {""}
+    for name in ("large.md", ARCHIVE_INDEX):
+        machines.update(shard_machine(p, name) for p in shard_paths(goldfish_dir / name))
+    return sorted(machines)
+
+
+def record_move(project_path: Path, prefix: str, event: str, other_project: str = ""):
+    """Append 'out' (session left this project) or 'in' (it came back) to this machine's move log."""
+    log_path = own_move_log(project_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    record = {"session": prefix, "event": event, "project": other_project, "time": time.time()}
+    with open(log_path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def own_move_log(project_path: Path) -> Path:
+    return project_path / "goldfish" / shard_name(MOVED_LOG, machine_id())
+
+
+def moved_out(project_path: Path) -> set:
+    """Session prefixes whose latest move record (any machine) says they left this project."""
+    latest = {}
+    for log_path in shard_paths(project_path / "goldfish" / MOVED_LOG):
+        for line in log_path.read_text().splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            prefix = record.get("session", "")
+            if prefix not in latest or record.get("time", 0) >= latest[prefix]["time"]:
+                latest[prefix] = {"event": record.get("event"), "time": record.get("time", 0)}
+    return {prefix for prefix, record in latest.items() if record["event"] == "out"}
+
+
+def load_index(goldfish_dir: Path, machine: str = "") -> dict:
+    """Load a segment's archive index (empty index if there's no archive yet)."""
+    index_path = goldfish_dir / shard_name(ARCHIVE_INDEX, machine)
+    if index_path.exists():
+        with open(index_path) as f:
+            return json.load(f)
+    return {"version": ARCHIVE_VERSION, "blocks": [], "sessions": {}}
+
+
+def save_index(goldfish_dir: Path, index: dict, machine: str = ""):
+    """Write the index atomically so a crash never leaves it half-written."""
+    index_path = goldfish_dir / shard_name(ARCHIVE_INDEX, machine)
+    tmp_path = index_path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+
+
+def read_block(goldfish_dir: Path, block: dict, machine: str = "") -> str:
+    """Read and decompress a single block."""
+    with open(goldfish_dir / shard_name(ARCHIVE_BIN, machine), 'rb') as f:
+        f.seek(block["offset"])
+        data = f.read(block["length"])
+    return decompress(data, block["codec"]).decode("utf-8")
+
+
+def write_blocks(goldfish_dir: Path, index: dict, entries: list, block_size: int, machine: str = ""):
+    """Append entries to a segment's archive in blocks of roughly block_size raw bytes."""
+    codec = best_codec()
+    bin_path = goldfish_dir / shard_name(ARCHIVE_BIN, machine)
+
+    # Group entries into blocks
+    groups = []
+    current = []
+    current_size = 0
+    for entry in entries:
+        size = len(entry.encode("utf-8"))
+        if current and current_size + size > block_size:
+            groups.append(current)
+            current = []
+            current_size = 0
+        current.append(entry)
+        current_size += size
+    if current:
+        groups.append(current)
+
+    with open(bin_path, 'ab') as f:
+        offset = f.tell()
+        for group in groups:
+            raw = bytearray()
+            positions = []
+            for entry in group:
+                data = entry.encode("utf-8")
+                positions.append((entry, len(raw), len(data)))
+                raw.extend(data)
+
+            compressed = compress(bytes(raw), codec)
+            f.write(compressed)
+
+            block_no = len(index["blocks"])
+            index["blocks"].append({
+                "offset": offset,
+                "length": len(compressed),
+                "raw_length": len(raw),
+                "codec": codec,
+            })
+            offset += len(compressed)
+
+            for entry, start, length in positions:
+                index["sessions"][entry_session_prefix(entry)] = {
+                    "block": block_no,
+                    "start": start,
+                    "length": length,
+                    "date": entry_date(entry),
+                }
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+def compact_project(project_path: Path, max_age_days: int, block_size: int, dry_run: bool = False) -> dict:
+    """Move entries older than max_age_days from this machine's large.md segment into its archive.
+
+    The plain large.md is compacted too while no other machine has written
+    to the project, so single-machine setups keep it small.
+    """
+    goldfish_dir = project_path / "goldfish"
+    own = machine_id()
+    machines = segments(goldfish_dir)
+    targets = [own]
+    if not set(machines) - {"", own}:
+        targets.insert(0, "")
+
+    result = {"archived": 0, "bytes_before": 0, "bytes_after": 0}
+    for machine in targets:
+        segment_result = compact_segment(goldfish_dir, machine, max_age_days, block_size, dry_run)
+        for key in result:
+            result[key] += segment_result[key]
+    return result
+
+
+def compact_segment(goldfish_dir: Path, machine: str, max_age_days: int, block_size: int, dry_run: bool = False) -> dict:
+    """Compact one large.md segment."""
+    large_path = goldfish_dir / shard_name("large.md", machine)
+    result = {"archived": 0, "bytes_before": 0, "bytes_after": 0}
+
+    if not large_path.exists():
+        return result
+
+    content = large_path.read_text()
+    result["bytes_before"] = result["bytes_after"] = len(content.encode("utf-8"))
+
+    header, entries = split_entries(content)
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    index = load_index(goldfish_dir, machine)
+    hidden = moved_out(goldfish_dir.parent)
+
+    keep = []
+    to_archive = []
+    for entry in entries:
+        prefix = entry_session_prefix(entry)
+        if prefix in index["sessions"]:
+            # Already archived by an interrupted earlier run - just drop the hot copy
+            continue
+        if prefix in hidden:
+            # Relocated to another project; readers already skip it
+            continue
+        date = parse_entry_date(entry_date(entry))
+        if date is not None and date < cutoff:
+            to_archive.append(entry)
+        else:
+            keep.append(entry)
+
+    dropped = len(entries) - len(keep) - len(to_archive)
+    if not to_archive and not dropped:
+        return result
+
+    new_content = header + "".join(keep)
+    result["archived"] = len(to_archive)
+    result["bytes_after"] = len(new_content.encode("utf-8"))
+    if dry_run:
+        return result
+
+    # Order matters for crash safety: blocks, then index, then the hot file.
+    if to_archive:
+        write_blocks(goldfish_dir, index, to_archive, block_size, machine)
+        save_index(goldfish_dir, index, machine)
+
+    tmp_path = large_path.with_suffix(".md.tmp")
+    tmp_path.write_text(new_content)
+    os.replace(tmp_path, large_path)
+
+    return result
+
+
+def iter_projects():
+    """Yield every project directory that has a goldfish/ folder."""
+    if not GOLDFISH_PATH.exists():
+        return
+    for goldfish_dir in sorted(GOLDFISH_PATH.glob("*/**/goldfish")):
+        if goldfish_dir.is_dir() and not any(p.startswith(".") for p in goldfish_dir.relative_to(GOLDFISH_PATH).parts):
+            yield goldfish_dir.parent
+
+
+def compact_all(max_age_days: int = None, dry_run: bool = False) -> dict:
+    """Run compaction across every project in every vault."""
+    settings = load_settings()
+    if max_age_days is None:
+        max_age_days = settings["max_age_days"]
+    block_size = settings["block_size_kb"] * 1024
+
+    totals = {"projects": 0, "archived": 0, "bytes_saved": 0}
+    for project_path in iter_projects():
+        result = compact_project(project_path, max_age_days, block_size, dry_run)
+        if result["archived"]:
+            if not dry_run:
+                bundle.refresh(project_path)
+            totals["projects"] += 1
+            totals["archived"] += result["archived"]
+            totals["bytes_saved"] += result["bytes_before"] - result["bytes_after"]
+            print(f"  {project_path.parent.name}/{project_path.name}: archived {result['archived']} sessions")
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Reading across both tiers
+# ---------------------------------------------------------------------------
+
+def hot_entries(project_path: Path, include_moved: bool = False) -> list:
+    """Every large.md entry of a project, across all machine segments.
+
+    Sessions that were relocated to another project are skipped unless
+    include_moved is set.
+    """
+    goldfish_dir = project_path / "goldfish"
+    hidden = set() if include_moved else moved_out(project_path)
+    entries = []
+    for large_path in shard_paths(goldfish_dir / "large.md"):
+        entries.extend(e for e in split_entries(large_path.read_text())[1]
+                       if entry_session_prefix(e) not in hidden)
+    return entries
+
+
+def archived_prefixes(project_path: Path) -> set:
+    """Session ID prefixes in any segment's archive, without decompressing it."""
+    goldfish_dir = project_path / "goldfish"
+    prefixes = set()
+    for machine in segments(goldfish_dir):
+        prefixes.update(load_index(goldfish_dir, machine)["sessions"])
+    return prefixes - moved_out(project_path)
+
+
+def holds_session(project_path: Path, prefix: str) -> bool:
+    """Whether any segment of either tier physically holds a session, hidden or not."""
+    if any(entry_session_prefix(e) == prefix for e in hot_entries(project_path, include_moved=True)):
+        return True
+    goldfish_dir = project_path / "goldfish"
+    return any(prefix in load_index(goldfish_dir, machine)["sessions"] for machine in segments(goldfish_dir))
+
+
+def read_session(project_path: Path, session_id: str):
+    """Return one session's entry from large.md or the archive (None if not found)."""
+    goldfish_dir = project_path / "goldfish"
+
+    for entry in hot_entries(project_path):
+        if entry_matches(entry, session_id):
+            return entry
+
+    hidden = moved_out(project_path)
+    for machine in segments(goldfish_dir):
+        index = load_index(goldfish_dir, machine)
+        for prefix, location in index["sessions"].items():
+            if prefix in hidden:
+                continue
+            if session_id.startswith(prefix) or prefix.startswith(session_id):
+                raw = read_block(goldfish_dir, index["blocks"][location["block"]], machine).encode("utf-8")
+                return raw[location["start"]:location["start"] + location["length"]].decode("utf-8")
+
+    return None
+
+
+def iter_history(project_path: Path):
+    """Yield (session_prefix, date, entry, tier) for every session, oldest tier first.
+
+    Archived blocks are decompressed one at a time, so memory stays bounded
+    by the block size rather than the archive size.
+    """
+    goldfish_dir = project_path / "goldfish"
+    hot = hot_entries(project_path)
+    seen = {entry_session_prefix(e) for e in hot} | moved_out(project_path)
+
+    for machine in segments(goldfish_dir):
+        index = load_index(goldfish_dir, machine)
+        by_block = {}
+        for prefix, location in index["sessions"].items():
+            by_block.setdefault(location["block"], []).append((location["start"], prefix, location))
+
+        for block_no in sorted(by_block):
+            raw = read_block(goldfish_dir, index["blocks"][block_no], machine).encode("utf-8")
+            for start, prefix, location in sorted(by_block[block_no]):
+                if prefix in seen:
+                    continue
+                seen.add(prefix)
+                entry = raw[start:start + location["length"]].decode("utf-8")
+                yield (prefix, location.get("date", ""), entry, "archive")
+
+    for entry in hot:
+        yield (entry_session_prefix(entry), entry_date(entry), entry, "hot")
+
+
+def project_vault(project_path: Path) -> Path:
+    """Vault directory containing a project (first level under GOLDFISH_PATH)."""
+    project_path = project_path.resolve()
+    try:
+        return GOLDFISH_PATH / project_path.relative_to(GOLDFISH_PATH.resolve()).parts[0]
+    except ValueError:
+        return project_path.parent
+
+
+def session_prefixes(project_path: Path) -> set:
+    """Session ID prefixes in either tier, without decompressing the archive."""
+    prefixes = archived_prefixes(project_path)
+    prefixes.update(entry_session_prefix(e) for e in hot_entries(project_path))
+    return prefixes
+
+
+def project_stats(project_path: Path) -> dict:
+    """Sizes of the hot and cold tiers for one project, summed over segments."""
+    goldfish_dir = project_path / "goldfish"
+    stats = {"hot_bytes": 0, "archive_bytes": 0, "archive_raw_bytes": 0, "archived_sessions": 0}
+    for machine in segments(goldfish_dir):
+        large_path = goldfish_dir / shard_name("large.md", machine)
+        bin_path = goldfish_dir / shard_name(ARCHIVE_BIN, machine)
+        index = load_index(goldfish_dir, machine)
+        stats["hot_bytes"] += large_path.stat().st_size if large_path.exists() else 0
+        stats["archive_bytes"] += bin_path.stat().st_size if bin_path.exists() else 0
+        stats["archive_raw_bytes"] += sum(b["raw_length"] for b in index["blocks"])
+        stats["archived_sessions"] += len(index["sessions"])
+    return stats
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    command = args[0]
+
+    if command == "compact":
+        settings = load_settings()
+        if not settings.get("enabled", True):
+            print("Archive compaction disabled in config")
+            return
+        days = None
+        if "--days" in args:
+            days = int(args[args.index("--days") + 1])
+        dry_run = "--dry-run" in args
+        totals = compact_all(days, dry_run)
+        verb = "Would archive" if dry_run else "Archived"
+        print(f"{verb} {totals['archived']} sessions from {totals['projects']} projects "
+              f"({totals['bytes_saved'] / 1024:.1f} KB removed from large.md)")
+
+        if not dry_run:
+            # Sweep blobs whose sessions were deleted from both tiers
+            from blobstore import gc_all
+            removed = gc_all()
+            if removed["blobs"]:
+                print(f"Deleted {removed['blobs']} unreferenced blobs ({removed['bytes'] / 1024:.1f} KB)")
+
+    elif command == "read" and len(args) >= 3:
+        project_path = Path(args[1]).expanduser()
+        entry = read_session(project_path, args[2])
+        if entry is None:
+            print(f"Session {args[2]} not found")
+            sys.exit(1)
+        if "--expand" in args:
+            from blobstore import BlobStore, expand_blobs
+            entry = expand_blobs(entry, BlobStore(project_vault(project_path)))
+        print(entry.strip())
+
+    elif command == "cat" and len(args) >= 2:
+        project_path = Path(args[1]).expanduser()
+        store = None
+        if "--expand" in args:
+            from blobstore import BlobStore, expand_blobs
+            store = BlobStore(project_vault(project_path))
+        for _, _, entry, _ in iter_history(project_path):
+            sys.stdout.write(expand_blobs(entry, store) if store else entry)
+        print()
+
+    elif command == "stats":
+        for project_path in iter_projects():
+            stats = project_stats(project_path)
+            if not stats["archived_sessions"]:
+                continue
+            ratio = stats["archive_raw_bytes"] / max(stats["archive_bytes"], 1)
+            print(f"  {project_path.parent.name}/{project_path.name}: "
+                  f"hot {stats['hot_bytes'] / 1024:.1f} KB | "
+                  f"archive {stats['archive_bytes'] / 1024:.1f} KB "
+                  f"({stats['archived_sessions']} sessions, {ratio:.1f}x)")
+
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        # Output piped into head/less that exited early. Point stdout at
+        # devnull so the interpreter's final flush doesn't raise again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
@@ -57,6 +57,7 @@ echo $$ > "$LOCK_FILE"
 trap "rm -f $LOCK_FILE" EXIT
 
 log "Starting auto-save"
+START_TIME=$(date +%s)
 
 cd "$GOLDFISH_DIR/scripts"
 
@@ -64,6 +65,7 @@ cd "$GOLDFISH_DIR/scripts"
 python3 reader.py >> "$LOG_FILE" 2>&1
 if [ $? -ne 0 ]; then
     log "ERROR: reader.py failed"
+    python3 status.py record-run "$START_TIME" --failed reader.py 2>> "$LOG_FILE"
     exit 1
 fi
 
@@ -71,9 +73,17 @@ fi
 python3 transcript-appender.py >> "$LOG_FILE" 2>&1
 if [ $? -ne 0 ]; then
     log "ERROR: transcript-appender.py failed"
+    python3 status.py record-run "$START_TIME" --failed transcript-appender.py 2>> "$LOG_FILE"
     exit 1
 fi
 
+# Archive old sessions out of large.md (non-fatal: history stays in large.md if it fails)
+if ! python3 archive.py compact >> "$LOG_FILE" 2>&1; then
+    log "WARNING: archive.py compact failed"
+    python3 status.py record-error archive.py 2>> "$LOG_FILE"
+fi
+
 # Record success
 date +%s > "$LAST_SAVE_FILE"
+python3 status.py record-run "$START_TIME" >> "$LOG_FILE" 2>&1
 log "Auto-save complete. Run /gfsave for quality summaries."
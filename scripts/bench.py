@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Goldfish Benchmark
+
+Generates a synthetic session corpus in a throwaway HOME and times the
+reader pipeline stages against it. Nothing outside the temp directory is
+touched.
+
+Usage:
+  bench.py [--sessions 10000] [--projects 40] [--agents 0.2] [--keep]
+
+--agents is the fraction of sessions that spawn subagents (1-3 each; one in
+twenty of those spawns a dozen, which exercises the parallel path).
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORDS = (
+    "oauth webhook square payment invoice dashboard chart migration schema postgres "
+    "supabase react component hook sidebar layout tailwind button modal form validation "
+    "fastapi endpoint router middleware auth token refresh session cache redis queue "
+    "worker cron scraper crawler parser pdf export import csv report email template "
+    "docker compose deploy pipeline github action release changelog lint typescript "
+    "python rust test fixture mock benchmark profiler memory leak latency retry timeout"
+).split()
+EXTENSIONS = ["py", "ts", "tsx", "js", "md", "sql", "css", "rs", "sh", "json"]
+COMMANDS = ["git status", "npm run build", "pytest -q", "docker compose up", "cargo test",
+            "ls -la", "python3 manage.py migrate", "npm test", "make lint"]
+
+
+def option(args: list, name: str, default):
+    """Value following --name in args, converted to default's type."""
+    if name in args:
+        return type(default)(args[args.index(name) + 1])
+    return default
+
+
+def write_session(path: Path, rng: random.Random, project_dir: str, theme: list, parent_id: str = None):
+    """One synthetic session transcript in Claude Code's JSONL format.
+
+    With parent_id it's a subagent transcript in the older layout, where each
+    line carries the parent's sessionId.
+    """
+    words = theme + rng.sample(WORDS, 6)
+    first = "please " + " ".join(rng.choice(words) for _ in range(rng.randint(8, 30)))
+    records = [{"type": "user", "message": {"role": "user", "content": first}}]
+    for _ in range(rng.randint(3, 20)):
+        blocks = [{"type": "text", "text": " ".join(rng.choice(words) for _ in range(20))}]
+        for _ in range(rng.randint(0, 3)):
+            name = f"{rng.choice(words)}_{rng.choice(words)}.{rng.choice(EXTENSIONS)}"
+            blocks.append({"type": "tool_use", "name": "Edit",
+                           "input": {"file_path": f"{project_dir}/src/{rng.choice(theme)}/{name}"}})
+        if rng.random() < 0.5:
+            blocks.append({"type": "tool_use", "name": "Bash", "input": {"command": rng.choice(COMMANDS)}})
+        records.append({"type": "assistant", "message": {"role": "assistant", "content": blocks}})
+        records.append({"type": "user", "message": {"role": "user", "content": [
+            {"type": "tool_result", "content": "ok " * rng.randint(5, 200)}]}})
+    if parent_id:
+        for record in records:
+            record["sessionId"] = parent_id
+            record["isSidechain"] = True
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def write_agents(session_path: Path, rng: random.Random, project_dir: str, theme: list) -> int:
+    """Subagent transcripts for one session, split between both on-disk layouts."""
+    count = 12 if rng.random() < 0.05 else rng.randint(1, 3)
+    session_id = session_path.stem
+    for a in range(count):
+        agent_name = f"agent-{session_id[:6]}{a:02d}.jsonl"
+        if rng.random() < 0.5:
+            agent_dir = session_path.parent / session_id / "subagents"
+            agent_dir.mkdir(parents=True, exist_ok=True)
+            write_session(agent_dir / agent_name, rng, project_dir, theme)
+        else:
+            write_session(session_path.parent / agent_name, rng, project_dir, theme, parent_id=session_id)
+    return count
+
+
+def build_corpus(root: Path, sessions: int, projects: int, agents: float = 0.0, seed: int = 7) -> list:
+    """Write the synthetic corpus under root/.claude/projects. Returns session file paths."""
+    rng = random.Random(seed)
+    paths = []
+    for p in range(projects):
+        project_dir = f"/Users/bench/Projects/project-{p:03d}"
+        session_dir = root / ".claude" / "projects" / project_dir.replace("/", "-")
+        session_dir.mkdir(parents=True, exist_ok=True)
+        theme = rng.sample(WORDS, 4)
+        for s in range(sessions // projects):
+            path = session_dir / f"{p:04d}{s:06d}-bench-session.jsonl"
+            write_session(path, rng, project_dir, theme)
+            if rng.random() < agents:
+                write_agents(path, rng, project_dir, theme)
+            paths.append(path)
+    return paths
+
+
+def timed(label: str, func, *args):
+    """Run func(*args), print how long it took, return its result."""
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"  {label:<36} {time.perf_counter() - start:8.2f}s")
+    return result
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if args and args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    sessions = option(args, "--sessions", 10000)
+    projects = option(args, "--projects", 40)
+    agents = option(args, "--agents", 0.2)
+    root = Path(tempfile.mkdtemp(prefix="goldfish-bench-"))
+
+    # Every Goldfish path is derived from HOME at import time
+    os.environ["HOME"] = str(root)
+    (root / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish" / ".goldfish").mkdir(parents=True)
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import reader
+    import topics
+
+    print(f"Goldfish benchmark: {sessions} sessions across {projects} projects ({root})")
+    timed("generate corpus", build_corpus, root, sessions, projects, agents)
+
+    def classify_all(infos):
+        return reader.classify_sessions_cached(infos)[0]
+
+    session_files, agents_by_session, _ = timed("find sessions + link subagents", reader.find_session_files,
+                                                root / ".claude" / "projects")
+    agent_count = sum(len(a) for a in agents_by_session.values())
+
+    start = time.perf_counter()
+    timed("extract (sessions only)", reader.extract_all_sessions, session_files, {})
+    sessions_only = time.perf_counter() - start
+
+    start = time.perf_counter()
+    infos = timed(f"extract (+{agent_count} subagents)", reader.extract_all_sessions,
+                  session_files, agents_by_session)
+    added = time.perf_counter() - start - sessions_only
+    print(f"  subagents added {added:.2f}s ({added / max(sessions_only, 1e-9):.0%}) across "
+          f"{len(agents_by_session)} sessions")
+    classifications = timed("classify (cold cache)", classify_all, infos)
+    timed("topics (cold corpus)", topics.process_sessions, infos, classifications, reader.EXCLUDED_DIRS)
+    timed("classify (warm cache)", classify_all, infos)
+    stats = timed("topics (warm corpus)", topics.process_sessions, infos, classifications, reader.EXCLUDED_DIRS)
+    print(f"  {stats['terms']} terms, {stats['projects']} projects")
+
+    if "--keep" not in args:
+        import shutil
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Goldfish Blob Store
+
+Content-addressed, compressed storage for bulky tool payloads (file contents,
+command output) referenced from rendered transcripts. One store per vault:
+
+  <vault>/.goldfish-blobs/objects/ab/<hash>     compressed payloads
+  <vault>/.goldfish-blobs/refs.<machine>.json   hash -> size, codec, referencing sessions,
+                                                last time a session referenced it
+
+Transcripts reference a payload as [blob:<hash>]. The same file read in ten
+sessions is stored once with ten references. Each machine records its own
+references; a blob is only deleted when no machine's references keep it.
+
+Usage:
+  blobstore.py stats                 Dedup stats per vault
+  blobstore.py show <vault> <hash>   Print one payload
+  blobstore.py gc                    Drop references from deleted sessions, delete unreferenced blobs
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from archive import GOLDFISH_PATH, best_codec, compress, decompress, iter_projects, session_prefixes
+from history import SESSION_PREFIX_CHARS
+from machine import own_shard, shard_paths
+
+BLOB_DIR = ".goldfish-blobs"
+BLOB_REF_RE = re.compile(r"\[blob:([0-9a-f]{32})\]")
+HASH_CHARS = 32
+
+# Another machine's refs can sync before the transcript that uses them, so
+# blobs written or referenced recently (by any machine) are never collected.
+GC_GRACE_SECONDS = 24 * 3600
+
+
+def blob_digest(data: str) -> str:
+    """Content address of a payload (what put() returns for it)."""
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:HASH_CHARS]
+
+
+class BlobStore:
+    """Blob store for one vault. Call save() to persist reference changes."""
+
+    def __init__(self, vault_path: Path):
+        self.root = Path(vault_path) / BLOB_DIR
+        self.refs_path = own_shard(self.root / "refs.json")
+        self.refs = {}
+        self.other_refs = {}    # Read-only references from other machines (and the shared refs.json)
+        self.dirty = False
+        for path in shard_paths(self.root / "refs.json"):
+            try:
+                with open(path) as f:
+                    refs = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                continue
+            if path == self.refs_path:
+                self.refs = refs
+                continue
+            for digest, meta in refs.items():
+                merged = self.other_refs.setdefault(digest, {**meta, "sessions": []})
+                merged["sessions"].extend(meta["sessions"])
+                merged["referenced"] = max(merged.get("referenced", 0), meta.get("referenced", 0))
+
+    def _meta(self, digest: str):
+        return self.refs.get(digest) or self.other_refs.get(digest)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def put(self, data: str, session_id: str) -> str:
+        """Store data (if new) and record that session_id references it."""
+        raw = data.encode("utf-8")
+        digest = blob_digest(data)
+        meta = self.refs.get(digest)
+
+        if meta is None and digest in self.other_refs and self._object_path(digest).exists():
+            # Stored by another machine: just start referencing it here
+            meta = {**self.other_refs[digest], "sessions": []}
+            self.refs[digest] = meta
+        elif meta is None or not self._object_path(digest).exists():
+            codec = best_codec()
+            compressed = compress(raw, codec)
+            path = self._object_path(digest)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, path)
+            meta = {"size": len(raw), "stored": len(compressed), "codec": codec, "sessions": []}
+            self.refs[digest] = meta
+
+        if session_id not in meta["sessions"]:
+            meta["sessions"].append(session_id)
+        # Re-referencing restarts the grace period; the object's mtime doesn't change
+        meta["referenced"] = int(time.time())
+        self.dirty = True
+        return digest
+
+    def get(self, digest: str):
+        """Return a payload as text, or None if it isn't in this store."""
+        meta = self._meta(digest)
+        path = self._object_path(digest)
+        if meta is None or not path.exists():
+            return None
+        return decompress(path.read_bytes(), meta["codec"]).decode("utf-8")
+
+    def gc(self, live_prefixes: set = None) -> dict:
+        """Delete unreferenced blobs.
+
+        When live_prefixes is given, references from sessions whose ID
+        prefix isn't in it (deleted sessions) are dropped first. Only this
+        machine's references are rewritten; another machine's reference
+        keeps a blob alive as long as its session is live.
+        """
+        def is_live(session_id):
+            return live_prefixes is None or session_id[:SESSION_PREFIX_CHARS] in live_prefixes
+
+        removed = {"references": 0, "blobs": 0, "bytes": 0}
+        cutoff = time.time() - GC_GRACE_SECONDS
+        for digest in set(self.refs) | set(self.other_refs):
+            meta = self.refs.get(digest)
+            if meta is not None:
+                live = [s for s in meta["sessions"] if is_live(s)]
+                removed["references"] += len(meta["sessions"]) - len(live)
+                meta["sessions"] = live
+
+            if meta and meta["sessions"]:
+                continue
+            other = self.other_refs.get(digest)
+            if other and any(is_live(s) for s in other["sessions"]):
+                continue
+
+            # Unreferenced blobs stay listed until they're past the grace period,
+            # counted from the last write or reference on any machine
+            path = self._object_path(digest)
+            referenced = max((m or {}).get("referenced", 0) for m in (meta, other))
+            if referenced > cutoff:
+                continue
+            if path.exists():
+                if path.stat().st_mtime > cutoff:
+                    continue
+                path.unlink()
+            removed["blobs"] += 1
+            removed["bytes"] += (meta or other)["stored"]
+            self.refs.pop(digest, None)
+            self.other_refs.pop(digest, None)
+        if removed["references"] or removed["blobs"]:
+            self.dirty = True
+        return removed
+
+    def stats(self) -> dict:
+        """Referenced vs unique vs on-disk bytes for this store (all machines)."""
+        refs = {digest: {**meta, "sessions": list(meta["sessions"])} for digest, meta in self.other_refs.items()}
+        for digest, meta in self.refs.items():
+            refs.setdefault(digest, {**meta, "sessions": []})["sessions"].extend(meta["sessions"])
+        logical = sum(m["size"] * len(m["sessions"]) for m in refs.values())
+        unique = sum(m["size"] for m in refs.values())
+        stored = sum(m["stored"] for m in refs.values())
+        return {
+            "blobs": len(refs),
+            "references": sum(len(m["sessions"]) for m in refs.values()),
+            "logical_bytes": logical,
+            "unique_bytes": unique,
+            "stored_bytes": stored,
+            "dedup_ratio": logical / unique if unique else 1.0,
+            "total_ratio": logical / stored if stored else 1.0,
+        }
+
+    def save(self):
+        """Persist the reference table if anything changed."""
+        if not self.dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.refs_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.refs, f, separators=(",", ":"))
+        os.replace(tmp_path, self.refs_path)
+        self.dirty = False
+
+
+def move_references(text: str, session_id: str, source: BlobStore, target: BlobStore):
+    """Move a session's blobs between vault stores when its entry changes vault."""
+    if source.root == target.root:
+        return
+    for digest in set(BLOB_REF_RE.findall(text)):
+        data = source.get(digest)
+        if data is not None:
+            target.put(data, session_id)
+        meta = source.refs.get(digest)
+        if meta and session_id in meta["sessions"]:
+            meta["sessions"].remove(session_id)
+            source.dirty = True
+
+
+def expand_blobs(text: str, store: BlobStore) -> str:
+    """Replace [blob:<hash>] markers with the full payload."""
+    def replace(match):
+        data = store.get(match.group(1))
+        if data is None:
+            return match.group(0)
+        return "\n```\n" + data + "\n```"
+    return BLOB_REF_RE.sub(replace, text)
+
+
+def iter_vaults():
+    """Yield vault directories that have a blob store."""
+    if not GOLDFISH_PATH.exists():
+        return
+    for vault_path in sorted(GOLDFISH_PATH.iterdir()):
+        if (vault_path / BLOB_DIR).is_dir():
+            yield vault_path
+
+
+def live_session_prefixes(vault_path: Path) -> set:
+    """Session ID prefixes present in any project of the vault, either tier."""
+    prefixes = set()
+    for project_path in iter_projects():
+        if project_path.is_relative_to(vault_path):
+            prefixes |= session_prefixes(project_path)
+    return prefixes
+
+
+def gc_all() -> dict:
+    """Garbage-collect every vault's blob store."""
+    totals = {"references": 0, "blobs": 0, "bytes": 0}
+    for vault_path in iter_vaults():
+        store = BlobStore(vault_path)
+        removed = store.gc(live_session_prefixes(vault_path))
+        store.save()
+        for key in totals:
+            totals[key] += removed[key]
+    return totals
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    command = args[0]
+
+    if command == "stats":
+        for vault_path in iter_vaults():
+            s = BlobStore(vault_path).stats()
+            print(f"  {vault_path.name}: {s['blobs']} blobs, {s['references']} references | "
+                  f"{s['logical_bytes'] / 1024:.1f} KB referenced, {s['stored_bytes'] / 1024:.1f} KB on disk | "
+                  f"dedup {s['dedup_ratio']:.1f}x, with compression {s['total_ratio']:.1f}x")
+
+    elif command == "show" and len(args) >= 3:
+        data = BlobStore(GOLDFISH_PATH / args[1]).get(args[2])
+        if data is None:
+            print(f"Blob {args[2]} not found")
+            sys.exit(1)
+        print(data)
+
+    elif command == "gc":
+        totals = gc_all()
+        print(f"Dropped {totals['references']} stale references, deleted {totals['blobs']} blobs "
+              f"({totals['bytes'] / 1024:.1f} KB)")
+
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
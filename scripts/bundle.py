@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Goldfish Context Bundle
+
+Builds goldfish/context.md for a project: everything a new session needs in
+one small read, kept under a token budget.
+
+  - manifest (token sizes, last updated, topics, session counts)
+  - pending inbox status
+  - small.md
+  - the most recent session summaries from medium.md that fit the budget
+
+The appender and /gfsave refresh it. A bundle is only rebuilt when one of its
+inputs (small/medium/large/inbox.md, archive index, move log, topics) or its
+token budget changed. large, inbox and archive inputs include every machine's
+shard. Timestamps are rendered in UTC, so content doesn't depend on where or
+when it was built.
+
+context.md is shared by every machine, so it's only written when its bytes
+actually change. The content depends only on the (synced) inputs, and the
+input fingerprint is kept machine-locally in ~/.goldfish/state/bundles.json.
+Once one machine has rebuilt a bundle, the others find identical content and
+leave the file alone.
+
+Usage:
+  bundle.py refresh <project_dir> [--force]
+  bundle.py refresh-all
+"""
+
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from history import entry_date
+from topics import load_project_topics
+from machine import shard_paths
+from inbox import pending_sessions
+import status
+
+CONFIG_PATH = Path.home() / ".goldfish" / "config.json"
+STATE_PATH = Path.home() / ".goldfish" / "state" / "bundles.json"
+
+BUNDLE_FILE = "context.md"
+INPUT_FILES = ("small.md", "medium.md", "large.md", "inbox.md", "large-archive.json", "moved.jsonl")
+
+DEFAULT_SETTINGS = {
+    "max_tokens": 2000,
+}
+
+CHARS_PER_TOKEN = 4
+HEADING_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def load_settings() -> dict:
+    """Load the "context_bundle" section of ~/.goldfish/config.json."""
+    settings = dict(DEFAULT_SETTINGS)
+    if CONFIG_PATH.exists():
+        try:
+            with open(CONFIG_PATH) as f:
+                settings.update(json.load(f).get("context_bundle", {}))
+        except (json.JSONDecodeError, OSError):
+            pass
+    return settings
+
+
+def input_fingerprint(goldfish_dir: Path, max_tokens: int) -> dict:
+    """(size, mtime) of every bundle input, plus the project's topics and the token budget."""
+    fingerprint = {"max_tokens": max_tokens}
+    for name in INPUT_FILES:
+        for path in shard_paths(goldfish_dir / name):
+            stat = path.stat()
+            # Whole seconds: sync clients keep mtimes, but not always to the nanosecond
+            fingerprint[path.name] = [stat.st_size, int(stat.st_mtime)]
+    project_topics = load_project_topics().get(status.project_key(goldfish_dir.parent))
+    if project_topics:
+        fingerprint["topics"] = project_topics["recent"] + project_topics["all"]
+    return fingerprint
+
+
+def load_state() -> dict:
+    """Machine-local record of each bundle's input fingerprint."""
+    if STATE_PATH.exists():
+        try:
+            with open(STATE_PATH) as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            pass
+    return {}
+
+
+def save_state(state: dict):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp_path, STATE_PATH)
+
+
+def utc_stamp(timestamp: float) -> str:
+    """Timestamp as UTC, so every machine renders the same text whatever its timezone."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%MZ")
+
+
+def file_updated(paths: list) -> str:
+    """Newest mtime of a file's shards as a manifest timestamp."""
+    if not paths:
+        return "never"
+    return utc_stamp(max(p.stat().st_mtime for p in paths))
+
+
+def build_manifest(goldfish_dir: Path, large_entries: list, archived_sessions: int, pending: list,
+                   as_of: float) -> str:
+    """Manifest block in the format described in docs/roadmap-v2.1.md.
+
+    this_week counts sessions in the 7 days before as_of (the newest input),
+    not before the build time, so it doesn't change without an input changing.
+    """
+    project_topics = load_project_topics().get(status.project_key(goldfish_dir.parent))
+    week_ago = (datetime.fromtimestamp(as_of, timezone.utc) - timedelta(days=7)).strftime("%Y-%m-%d")
+    this_week = sum(1 for e in large_entries if entry_date(e)[:10] >= week_ago)
+
+    # large.md lives in per-machine shards (see machine.py); sum them all
+    files = {name: shard_paths(goldfish_dir / f"{name}.md") for name in ("small", "medium", "large")}
+    lines = ["<!--MANIFEST", "tokens:"]
+    for name, paths in files.items():
+        size = sum(p.stat().st_size for p in paths)
+        lines.append(f"  {name}: {size // CHARS_PER_TOKEN}")
+    lines.append("updated:")
+    for name, paths in files.items():
+        lines.append(f"  {name}: {file_updated(paths)}")
+    if project_topics:
+        lines.append("topics:")
+        lines.append(f"  recent: [{', '.join(project_topics['recent'])}]")
+        lines.append(f"  all: [{', '.join(project_topics['all'])}]")
+    lines.append("sessions:")
+    lines.append(f"  total: {len(large_entries) + archived_sessions}")
+    lines.append(f"  archived: {archived_sessions}")
+    lines.append(f"  this_week: {this_week}")
+    lines.append(f"  pending_inbox: {len(pending)}")
+    lines.append("-->")
+    return "\n".join(lines)
+
+
+def split_summaries(medium: str) -> list:
+    """Split medium.md into (date, position, text) session summaries.
+
+    A dated ## section is one session, ### subsections included. An undated
+    ## section (e.g. "## Session History") is a container: its ### sections
+    are the sessions, and without any it isn't a summary at all.
+    """
+    summaries = []
+    for section in re.split(r"\n(?=## )", medium):
+        section = section.strip()
+        if not section.startswith("## "):
+            continue
+        heading = section.split("\n", 1)[0]
+        if HEADING_DATE_RE.search(heading):
+            sessions = [section]
+        else:
+            sessions = [s.strip() for s in re.split(r"\n(?=### )", section)[1:]]
+        for text in sessions:
+            match = HEADING_DATE_RE.search(text.split("\n", 1)[0])
+            summaries.append((match.group(1) if match else "", len(summaries), text))
+    return summaries
+
+
+def rank_summaries(summaries: list) -> list:
+    """Newest first: dated sections by date, then undated by position in the file."""
+    return sorted(summaries, key=lambda s: (s[0], s[1]), reverse=True)
+
+
+def build_bundle(project_path: Path, max_tokens: int, fingerprint: dict) -> tuple:
+    """Assemble context.md content for one project.
+
+    Returns (content, overflow_tokens): small.md counts against max_tokens
+    too, and is cut at a line boundary if it doesn't fit; overflow_tokens
+    is how much of it was left out.
+    """
+    from archive import hot_entries, archived_prefixes
+
+    goldfish_dir = project_path / "goldfish"
+
+    def read(name: str) -> str:
+        path = goldfish_dir / name
+        return path.read_text() if path.exists() else ""
+
+    small = read("small.md").strip()
+    medium = read("medium.md")
+    large_entries = hot_entries(project_path)
+    archived_sessions = len(archived_prefixes(project_path))
+    pending = pending_sessions(project_path)
+
+    # Stamped with the newest input, not the build time, so every machine
+    # builds byte-identical content from the same synced inputs
+    newest = max((v[1] for k, v in fingerprint.items() if k not in ("topics", "max_tokens")), default=0)
+    parts = [
+        f"# {project_path.name} — Session Context",
+        "",
+        f"*Precomputed by Goldfish from inputs as of {utc_stamp(newest)}. "
+        f"\"remember\" = medium.md | \"ultra remember\" = large.md*",
+        "",
+        build_manifest(goldfish_dir, large_entries, archived_sessions, pending, newest),
+        "",
+    ]
+
+    if pending:
+        parts.append(f"## Pending: {len(pending)} session(s) NEED PROCESSING")
+        for session_prefix, date in pending[:10]:
+            parts.append(f"- {session_prefix}... ({date})")
+        parts.append("")
+        parts.append("Process these first (transcripts in large*.md), mark them with `inbox.py done`, then refresh this bundle.")
+    else:
+        parts.append("## Pending: none")
+    parts.append("")
+
+    budget = max_tokens * CHARS_PER_TOKEN - sum(len(p) + 1 for p in parts)
+    overflow = 0
+    if small:
+        heading = "## Quick Context (small.md)"
+        budget -= len(heading) + 3
+        if len(small) + 1 > budget:
+            note = (f"*small.md is ~{len(small) // CHARS_PER_TOKEN} tokens, more than this bundle's "
+                    f"{max_tokens}-token budget allows. Read goldfish/small.md for the rest.*")
+            cut = small[:max(budget - len(note) - 2, 0)]
+            cut = cut[:cut.rfind("\n")] if "\n" in cut else ""
+            overflow = (len(small) - len(cut)) // CHARS_PER_TOKEN
+            small = f"{cut}\n\n{note}" if cut else note
+        parts.extend([heading, "", small, ""])
+        budget -= len(small) + 1
+
+    selected = []
+    for _, _, section in rank_summaries(split_summaries(medium)):
+        if len(section) + 2 > budget:
+            break
+        selected.append(section)
+        budget -= len(section) + 2
+
+    if selected:
+        parts.append("## Recent Sessions (from medium.md, newest first)")
+        parts.append("")
+        parts.append("\n\n".join(selected))
+        parts.append("")
+
+    return ("\n".join(parts), overflow)
+
+
+def refresh(project_path: Path, force: bool = False) -> bool:
+    """Rebuild context.md if any input changed. Returns True if it was rewritten."""
+    goldfish_dir = project_path / "goldfish"
+    if not goldfish_dir.is_dir():
+        return False
+
+    bundle_path = goldfish_dir / BUNDLE_FILE
+    max_tokens = load_settings()["max_tokens"]
+    fingerprint = input_fingerprint(goldfish_dir, max_tokens)
+    state = load_state()
+    key = status.project_key(project_path)
+    recorded = state.get(key, {})
+    if not force and recorded.get("inputs") == fingerprint and bundle_path.exists():
+        return False
+
+    content, overflow = build_bundle(project_path, max_tokens, fingerprint)
+    if overflow:
+        print(f"  WARNING: {project_path.name}/goldfish/small.md is ~{overflow} tokens over the "
+              f"{max_tokens}-token context bundle; the bundle shows only the start of it")
+    data = content.encode("utf-8")
+    # Another machine may already have written this exact bundle
+    changed = not bundle_path.exists() or bundle_path.read_bytes() != data
+    if changed:
+        tmp_path = bundle_path.with_suffix(".md.tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(bundle_path)
+
+    state[key] = {"inputs": fingerprint}
+    save_state(state)
+
+    # Same inputs feed the status snapshot's project entry
+    status.update_projects([project_path])
+    return changed
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    if args[0] == "refresh" and len(args) >= 2:
+        project_path = Path(args[1]).expanduser()
+        changed = refresh(project_path, "--force" in args)
+        print(f"{project_path.name}: {'refreshed' if changed else 'up to date'}")
+    elif args[0] == "refresh-all":
+        from archive import iter_projects
+        refreshed = sum(1 for p in iter_projects() if refresh(p))
+        print(f"Refreshed {refreshed} context bundles")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Goldfish Evidence Lookup
+
+Lets the QC agent check summary claims against session history without
+reading large.md into context. Sessions from both tiers (large.md and the
+archive, across every machine's segment) are split into short passages and
+kept in a machine-local inverted index (~/.goldfish/state/evidence/). Each
+claim is scored against it with BM25 term matching, a phrase bonus for
+matching word pairs, and a recency weight. The result is a compact JSON
+evidence bundle.
+
+Usage:
+  evidence.py check <project_dir> "claim one" "claim two" ... [--top 3]
+  evidence.py check <project_dir> --file claims.txt      (one claim per line)
+  echo "claim" | evidence.py check <project_dir>
+  evidence.py rebuild <project_dir>
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from history import entry_session_prefix, entry_date
+
+STATE_PATH = Path.home() / ".goldfish" / "state" / "evidence"
+INDEX_VERSION = 1
+
+PASSAGE_CHARS = 500
+BM25_K1 = 1.2
+BM25_B = 0.75
+RECENCY_HALF_LIFE_DAYS = 90
+MIN_SCORE = 1.0
+
+TERM_RE = re.compile(r"[a-z0-9][a-z0-9_.-]*[a-z0-9]|[a-z0-9]")
+STOP_WORDS = {
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with",
+    "by", "from", "as", "is", "was", "are", "were", "be", "been", "it", "its", "this",
+    "that", "these", "those", "we", "i", "you", "they", "our", "my", "so", "then",
+    "there", "here", "into", "over", "also", "just", "now", "has", "have", "had",
+    "do", "does", "did", "will", "would", "can", "could", "should",
+}
+
+# Words that flip or retract a statement. A cue within CUE_WINDOW words of one
+# of the claim's terms, in the same sentence, may contradict the claim (unless
+# the claim uses the cue itself). Cues elsewhere in the passage are ignored:
+# ordinary transcripts are full of "no", "not" and "failed".
+CUE_WINDOW = 6
+SENTENCE_RE = re.compile(r"[.!?]+(?:\s+|$)|[;\n]+")
+WORD_RE = re.compile(r"[a-z0-9_.'-]+")
+CONTRADICTION_CUES = {
+    "not", "no", "never", "without", "instead", "reverted", "revert", "removed",
+    "dropped", "replaced", "switched", "abandoned", "broken", "failing", "failed",
+    "doesn't", "didn't", "don't", "isn't", "wasn't", "won't", "can't", "cannot",
+    "longer", "deprecated", "rolled", "undo", "undid",
+}
+
+
+def terms(text: str) -> list:
+    """Lowercased index terms (stop words removed)."""
+    return [t for t in TERM_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def split_passages(entry: str) -> list:
+    """Split a large.md entry into passages of roughly PASSAGE_CHARS."""
+    passages = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", entry):
+        paragraph = paragraph.strip()
+        if not paragraph or paragraph == "---":
+            continue
+        if current and len(current) + len(paragraph) > PASSAGE_CHARS:
+            passages.append(current)
+            current = ""
+        while len(paragraph) > PASSAGE_CHARS * 2:
+            passages.append(paragraph[:PASSAGE_CHARS])
+            paragraph = paragraph[PASSAGE_CHARS:]
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        passages.append(current)
+    return passages
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def index_path_for(project_path: Path) -> Path:
+    """Machine-local index file for a project (kept out of the synced folder)."""
+    project_path = project_path.resolve()
+    digest = hashlib.sha1(str(project_path).encode("utf-8")).hexdigest()[:8]
+    return STATE_PATH / f"{project_path.parent.name}__{project_path.name}__{digest}.json"
+
+
+def empty_index() -> dict:
+    return {"version": INDEX_VERSION, "sessions": {}, "passages": {}, "postings": {}, "next_id": 0}
+
+
+def load_index(project_path: Path) -> dict:
+    """Load the evidence index for a project."""
+    path = index_path_for(project_path)
+    if path.exists():
+        try:
+            with open(path) as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (json.JSONDecodeError, OSError):
+            pass
+    return empty_index()
+
+
+def save_index(project_path: Path, index: dict):
+    """Write the index atomically."""
+    path = index_path_for(project_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def add_session(index: dict, prefix: str, date: str, entry: str):
+    """Index one session's passages."""
+    ids = []
+    for text in split_passages(entry):
+        pid = str(index["next_id"])
+        index["next_id"] += 1
+        counts = Counter(terms(text))
+        index["passages"][pid] = {"s": prefix, "d": date, "t": text, "n": sum(counts.values())}
+        for term, tf in counts.items():
+            index["postings"].setdefault(term, {})[pid] = tf
+        ids.append(pid)
+    index["sessions"][prefix] = ids
+
+
+def remove_session(index: dict, prefix: str):
+    """Drop a session's passages (it was deleted or moved to another project)."""
+    for pid in index["sessions"].pop(prefix, []):
+        passage = index["passages"].pop(pid, None)
+        if not passage:
+            continue
+        for term in set(terms(passage["t"])):
+            postings = index["postings"].get(term)
+            if postings:
+                postings.pop(pid, None)
+                if not postings:
+                    del index["postings"][term]
+
+
+def update_index(project_path: Path, index: dict) -> int:
+    """Bring the index in line with both tiers. Returns sessions added or removed.
+
+    Only new sessions are parsed; archived blocks are decompressed only when
+    an archived session is missing from the index.
+    """
+    from archive import hot_entries, archived_prefixes, iter_history
+
+    hot = {entry_session_prefix(e): e for e in hot_entries(project_path)}
+    archived = archived_prefixes(project_path)
+
+    live = set(hot) | set(archived)
+    changes = 0
+    for prefix in set(index["sessions"]) - live:
+        remove_session(index, prefix)
+        changes += 1
+    missing = live - set(index["sessions"])
+    for prefix in missing & set(hot):
+        add_session(index, prefix, entry_date(hot[prefix]), hot[prefix])
+        changes += 1
+
+    missing_archived = missing - set(hot)
+    if missing_archived:
+        for prefix, date, entry, tier in iter_history(project_path):
+            if tier == "archive" and prefix in missing_archived:
+                add_session(index, prefix, date, entry)
+                changes += 1
+    return changes
+
+
+def open_index(project_path: Path) -> dict:
+    """Load, refresh and (if anything changed) save a project's index."""
+    index = load_index(project_path)
+    if update_index(project_path, index):
+        save_index(project_path, index)
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def recency_weight(date: str, now: datetime) -> float:
+    """1.0 for today, decaying towards 0.5 for very old sessions."""
+    try:
+        then = datetime.strptime(date[:10], "%Y-%m-%d")
+    except ValueError:
+        return 0.75
+    age_days = max((now - then).days, 0)
+    return 0.5 + 0.5 * math.exp(-age_days * math.log(2) / RECENCY_HALF_LIFE_DAYS)
+
+
+def stance(claim: str, passage_text: str) -> str:
+    """'supports' or 'possible_contradiction', based on cues next to the claim's terms."""
+    claim_words = {w.strip(".'-") for w in WORD_RE.findall(claim.lower())}
+    key_terms = set(terms(claim)) - CONTRADICTION_CUES
+    for sentence in SENTENCE_RE.split(passage_text.lower()):
+        words = [w.strip(".'-") for w in WORD_RE.findall(sentence)]
+        for i, word in enumerate(words):
+            if word not in key_terms:
+                continue
+            for nearby in words[max(0, i - CUE_WINDOW):i + CUE_WINDOW + 1]:
+                if nearby in CONTRADICTION_CUES and nearby not in claim_words:
+                    return "possible_contradiction"
+    return "supports"
+
+
+def search(index: dict, claim: str, top: int = 3, now: datetime = None) -> list:
+    """Top passages for a claim as (score, passage_id)."""
+    now = now or datetime.now()
+    query = terms(claim)
+    if not query or not index["passages"]:
+        return []
+
+    total = len(index["passages"])
+    avg_len = sum(p["n"] for p in index["passages"].values()) / total
+    scores = Counter()
+    matched = {}
+
+    for term in set(query):
+        postings = index["postings"].get(term)
+        if not postings:
+            continue
+        idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+        for pid, tf in postings.items():
+            length = index["passages"][pid]["n"]
+            scores[pid] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+            matched.setdefault(pid, set()).add(term)
+
+    # Only the best BM25 candidates pay for phrase matching and recency
+    bigrams = [f"{a} {b}" for a, b in zip(query, query[1:])]
+    results = []
+    for pid, score in scores.most_common(top * 10):
+        passage = index["passages"][pid]
+        text_terms = terms(passage["t"])
+        if bigrams:
+            passage_bigrams = {f"{a} {b}" for a, b in zip(text_terms, text_terms[1:])}
+            score *= 1 + sum(1 for bg in bigrams if bg in passage_bigrams) / len(bigrams)
+        score *= recency_weight(passage["d"], now)
+        coverage = len(matched[pid]) / len(set(query))
+        results.append((score, pid, coverage))
+
+    results.sort(reverse=True)
+    return results[:top]
+
+
+def check_claims(project_path: Path, claims: list, top: int = 3) -> dict:
+    """Evidence bundle for a list of claims."""
+    index = open_index(project_path)
+    now = datetime.now()
+    bundle = {"project": project_path.name, "sessions_indexed": len(index["sessions"]), "claims": []}
+
+    for claim in claims:
+        evidence = []
+        for score, pid, coverage in search(index, claim, top, now):
+            if score < MIN_SCORE:
+                continue
+            passage = index["passages"][pid]
+            evidence.append({
+                "session": passage["s"],
+                "date": passage["d"],
+                "score": round(score, 2),
+                "term_coverage": round(coverage, 2),
+                "stance": stance(claim, passage["t"]),
+                "text": passage["t"][:PASSAGE_CHARS],
+            })
+
+        if not evidence:
+            verdict = "no_evidence"
+        elif all(e["stance"] == "possible_contradiction" for e in evidence):
+            verdict = "contradicted"
+        elif any(e["stance"] == "possible_contradiction" for e in evidence):
+            verdict = "mixed"
+        else:
+            verdict = "supported"
+        bundle["claims"].append({"claim": claim, "verdict": verdict, "evidence": evidence})
+
+    return bundle
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    command = args[0]
+    project_path = Path(args[1]).expanduser()
+
+    if command == "rebuild":
+        index = empty_index()
+        update_index(project_path, index)
+        save_index(project_path, index)
+        print(f"Indexed {len(index['sessions'])} sessions ({len(index['passages'])} passages)")
+        return
+
+    if command != "check":
+        print(__doc__)
+        sys.exit(1)
+
+    top = 3
+    claims = []
+    rest = args[2:]
+    i = 0
+    while i < len(rest):
+        if rest[i] == "--top":
+            top = int(rest[i + 1])
+            i += 2
+        elif rest[i] == "--file":
+            claims.extend(line.strip() for line in Path(rest[i + 1]).read_text().split("\n") if line.strip())
+            i += 2
+        else:
+            claims.append(rest[i])
+            i += 1
+    if not claims and not sys.stdin.isatty():
+        claims = [line.strip() for line in sys.stdin if line.strip()]
+
+    print(json.dumps(check_claims(project_path, claims, top), indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Goldfish History Helpers
+Parses the session entries that the appender writes to large.md.
+"""
+
+import re
+
+# format_transcript() writes only the first 8 characters of the session ID
+SESSION_PREFIX_CHARS = 8
+
+# Every entry written by format_transcript() starts with this separator
+ENTRY_SEPARATOR = "\n\n---\n\n## Session: "
+ENTRY_SPLIT_RE = re.compile(r"(?=\n\n---\n\n## Session: )")
+ENTRY_ID_RE = re.compile(r"## Session: ([0-9A-Za-z_-]+)")
+ENTRY_DATE_RE = re.compile(r"\*\*Date:\*\* (.+)")
+
+
+def split_entries(content: str) -> tuple:
+    """Split large.md content into (header, [entry, ...])."""
+    parts = ENTRY_SPLIT_RE.split(content)
+    header = parts[0]
+    entries = [p for p in parts[1:] if p]
+    return (header, entries)
+
+
+def entry_session_prefix(entry: str) -> str:
+    """Return the (truncated) session ID an entry was written for."""
+    match = ENTRY_ID_RE.search(entry)
+    return match.group(1) if match else ""
+
+
+def entry_date(entry: str) -> str:
+    """Return the raw **Date:** value of an entry, if present."""
+    match = ENTRY_DATE_RE.search(entry)
+    return match.group(1).strip() if match else ""
+
+
+def entry_matches(entry: str, session_id: str) -> bool:
+    """Check whether an entry belongs to session_id (entries store an ID prefix)."""
+    prefix = entry_session_prefix(entry)
+    return bool(prefix) and session_id.startswith(prefix)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Goldfish Inbox
+
+The per-project queue of sessions waiting for /gfsave. Each machine appends
+to its own inbox.<machine>.md and never rewrites it:
+
+  ## NEW SESSION: <id>...       flagged by the machine that saved the session
+  ## PROCESSED: <id>... (<time>)  recorded by whichever machine ran /gfsave
+
+A session is pending while its newest flag is newer than its newest PROCESSED
+record, across every machine's shard. Clearing the inbox on one machine
+therefore never touches another machine's file.
+
+Usage:
+  inbox.py pending <project_dir>               List pending sessions
+  inbox.py done <project_dir> <id>... | --all  Mark sessions processed
+"""
+
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from history import SESSION_PREFIX_CHARS
+from machine import own_shard, shard_paths
+
+FLAG_RE = re.compile(
+    r"## NEW SESSION: ([0-9A-Za-z_-]+)\.*\s*\n\*\*Date:\*\* ([^\n]*)\n\*\*Status:\*\* NEEDS_PROCESSING"
+    r"(?:\n\*\*Flagged:\*\* ([^\n]*))?")
+PROCESSED_RE = re.compile(r"## PROCESSED: ([0-9A-Za-z_-]+)\.*\s*\(([^)\n]*)\)")
+
+
+def now_utc() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def append_to_shard(project_path: Path, text: str):
+    """Append to this machine's inbox shard, writing the header on first use."""
+    inbox_path = own_shard(project_path / "goldfish" / "inbox.md")
+    inbox_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(inbox_path, "a") as f:
+        if f.tell() == 0:
+            f.write(f"# {project_path.name} - Inbox\n\nNew sessions waiting for quality summaries.\n")
+        f.write(text)
+
+
+def add_session(project_path: Path, session: dict):
+    """Flag a session as needing processing."""
+    session_id = session.get("session_id", "unknown")[:SESSION_PREFIX_CHARS]
+    date = session.get("date", datetime.now().strftime("%Y-%m-%d %H:%M"))
+    first_msg = session.get("first_user_message", "")[:200]
+
+    append_to_shard(project_path, f"""
+---
+## NEW SESSION: {session_id}...
+**Date:** {date}
+**Status:** NEEDS_PROCESSING
+**Flagged:** {now_utc()}
+
+**Preview:**
+> {first_msg}...
+
+*Run /gfsave to generate quality summaries*
+---
+""")
+
+
+def mark_processed(project_path: Path, prefixes: list):
+    """Record sessions as processed in this machine's shard."""
+    if not prefixes:
+        return
+    stamp = now_utc()
+    append_to_shard(project_path, "".join(
+        f"\n## PROCESSED: {p[:SESSION_PREFIX_CHARS]}... ({stamp})\n" for p in prefixes))
+
+
+def move_flag(source: Path, target: Path, prefix: str, first_message: str = "") -> bool:
+    """Move a pending session's flag to the project it was relocated to."""
+    pending = dict(pending_sessions(source))
+    prefix = prefix[:SESSION_PREFIX_CHARS]
+    if prefix not in pending:
+        return False
+    mark_processed(source, [prefix])
+    add_session(target, {"session_id": prefix, "date": pending[prefix], "first_user_message": first_message})
+    return True
+
+
+def pending_sessions(project_path: Path) -> list:
+    """(prefix, date) of every pending session across all machines, in flag order."""
+    flagged = {}
+    processed = {}
+    for inbox_path in shard_paths(project_path / "goldfish" / "inbox.md"):
+        content = inbox_path.read_text()
+        for prefix, date, stamp in FLAG_RE.findall(content):
+            prefix = prefix[:SESSION_PREFIX_CHARS]
+            # Flags from before timestamps count as oldest
+            if prefix not in flagged or stamp >= flagged[prefix][1]:
+                flagged[prefix] = (date, stamp)
+        for prefix, stamp in PROCESSED_RE.findall(content):
+            prefix = prefix[:SESSION_PREFIX_CHARS]
+            processed[prefix] = max(stamp, processed.get(prefix, ""))
+
+    return [(prefix, date) for prefix, (date, stamp) in flagged.items()
+            if prefix not in processed or stamp > processed[prefix]]
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] in ("-h", "--help"):
+        print(__doc__)
+        sys.exit(0 if args and args[0] in ("-h", "--help") else 1)
+
+    command, project_path = args[0], Path(args[1]).expanduser()
+    if command == "pending":
+        for prefix, date in pending_sessions(project_path):
+            print(f"{prefix}  {date}")
+    elif command == "done":
+        if args[2:] == ["--all"]:
+            prefixes = [prefix for prefix, _ in pending_sessions(project_path)]
+        else:
+            prefixes = args[2:]
+        if not prefixes:
+            print("No sessions to mark processed")
+            return
+        mark_processed(project_path, prefixes)
+        print(f"Marked {len(prefixes)} session(s) processed")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Goldfish Machine Shards
+
+Lets several machines share one synced memory folder without rewriting the
+same files. Every file the pipeline writes gets a per-machine shard next to
+it, named after this machine's ID:
+
+  processed-sessions.json  ->  processed-sessions.<machine>.json
+  large.md                 ->  large.<machine>.md
+  inbox.md                 ->  inbox.<machine>.md
+
+A machine only ever writes its own shards. Readers merge the plain file (data
+from before sharding, or written by hand) with every machine's shard, so the
+sync client only ever sees one writer per file.
+
+The machine ID lives in ~/.goldfish/machine-id (outside the synced folder).
+It's created from the hostname on first use and can be edited.
+
+Usage:
+  machine.py id          Print this machine's ID
+  machine.py shards      List machines that have written to the memory folder
+"""
+
+import json
+import re
+import secrets
+import socket
+import sys
+from pathlib import Path
+
+GOLDFISH_PATH = Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish"
+MACHINE_ID_PATH = Path.home() / ".goldfish" / "machine-id"
+
+# Machine IDs end up in file names, so keep them to one safe "word"
+MACHINE_ID_RE = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+
+_machine_id = None
+
+
+def machine_id() -> str:
+    """This machine's ID, created on first use."""
+    global _machine_id
+    if _machine_id:
+        return _machine_id
+
+    if MACHINE_ID_PATH.exists():
+        value = MACHINE_ID_PATH.read_text().strip().lower()
+        if MACHINE_ID_RE.match(value):
+            _machine_id = value
+            return value
+
+    # Hostname plus a random suffix: two machines with the same name still differ
+    host = re.sub(r"[^a-z0-9-]+", "-", socket.gethostname().split(".")[0].lower()).strip("-")[:24]
+    _machine_id = f"{host or 'machine'}-{secrets.token_hex(2)}"
+    MACHINE_ID_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MACHINE_ID_PATH.write_text(_machine_id + "\n")
+    return _machine_id
+
+
+def shard_name(name: str, machine: str) -> str:
+    """'large.md' -> 'large.<machine>.md'. An empty machine gives the plain name."""
+    if not machine:
+        return name
+    stem, dot, suffix = name.partition(".")
+    return f"{stem}.{machine}{dot}{suffix}"
+
+
+def own_shard(path: Path) -> Path:
+    """This machine's shard of a shared file."""
+    return path.with_name(shard_name(path.name, machine_id()))
+
+
+def shard_machine(path: Path, base_name: str) -> str:
+    """Machine ID a shard belongs to ('' for the plain, unsharded file)."""
+    stem, _, suffix = base_name.partition(".")
+    middle = path.name[len(stem) + 1:len(path.name) - len(suffix) - 1]
+    return middle if path.name != base_name else ""
+
+
+def shard_paths(path: Path) -> list:
+    """Every existing version of a shared file: the plain file first, then each machine's shard."""
+    paths = [path] if path.exists() else []
+    stem, _, suffix = path.name.partition(".")
+    if path.parent.is_dir():
+        for candidate in sorted(path.parent.glob(f"{stem}.*.{suffix}")):
+            if MACHINE_ID_RE.match(shard_machine(candidate, path.name)):
+                paths.append(candidate)
+    return paths
+
+
+def load_json_shards(path: Path) -> list:
+    """(machine, data) for every readable version of a JSON file."""
+    loaded = []
+    for shard in shard_paths(path):
+        try:
+            with open(shard) as f:
+                loaded.append((shard_machine(shard, path.name), json.load(f)))
+        except (json.JSONDecodeError, OSError):
+            continue
+    return loaded
+
+
+def load_set_union(path: Path) -> set:
+    """Union of a JSON list file across all machines."""
+    merged = set()
+    for _, data in load_json_shards(path):
+        merged.update(data)
+    return merged
+
+
+def known_machines() -> dict:
+    """Machine ID -> processed session count, from the shared state folder."""
+    state_path = GOLDFISH_PATH / ".goldfish" / "processed-sessions.json"
+    return {machine or "(shared)": len(data) for machine, data in load_json_shards(state_path)}
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    if args[0] == "id":
+        print(machine_id())
+    elif args[0] == "shards":
+        own = machine_id()
+        for machine, count in sorted(known_machines().items()):
+            marker = " (this machine)" if machine == own else ""
+            print(f"  {machine}: {count} processed sessions{marker}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
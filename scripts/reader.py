@@ -4,6 +4,7 @@ Goldfish Reader Agent
 Scans Claude Code session files and extracts key information.
 """
 
+import hashlib
 import json
 import os
 import sys
@@ -12,8 +13,183 @@ from datetime import datetime
 from collections import defaultdict
 import re
 
-def extract_session_info(filepath: str) -> dict:
-    """Extract key information from a session file."""
+import topics
+from machine import own_shard
+
+# Cap on tool input samples kept per session (they only feed topic extraction)
+MAX_TOOL_INPUTS = 100
+
+# Sessions with at least this many subagent transcripts parse them in a process pool
+PARALLEL_AGENT_MIN = 8
+
+
+def first_message_text(msg: dict) -> str:
+    """Text of a user message (content blocks joined), capped at 500 chars."""
+    content = msg.get("message", {})
+    if isinstance(content, dict):
+        text = content.get("content", "")
+        if isinstance(text, list):
+            # Extract text from content blocks
+            text_parts = []
+            for block in text:
+                if isinstance(block, dict) and block.get("type") == "text":
+                    text_parts.append(block.get("text", ""))
+            text = " ".join(text_parts)
+        return text[:500] if text else None
+    elif isinstance(content, str):
+        return content[:500]
+    return None
+
+
+def scan_tool_calls(msg: dict, result: dict):
+    """Add the files, tools, tool inputs and mkdirs of one assistant message to result."""
+    content = msg.get("message", {})
+    if not isinstance(content, dict):
+        return
+    tool_calls = content.get("content", [])
+    if not isinstance(tool_calls, list):
+        return
+
+    for block in tool_calls:
+        if not isinstance(block, dict):
+            continue
+        tool_name = block.get("name", "")
+        if tool_name:
+            result["tools_used"].add(tool_name)
+
+        # Extract file paths from tool inputs
+        tool_input = block.get("input", {})
+        if not isinstance(tool_input, dict):
+            continue
+        for key in ["file_path", "path", "filepath"]:
+            if key in tool_input:
+                fp = tool_input[key]
+                if fp:
+                    result["files_touched"].add(fp)
+
+        # Keep short samples of commands, patterns and queries for topics
+        if len(result["tool_inputs"]) < MAX_TOOL_INPUTS:
+            for key in ["command", "pattern", "query", "description"]:
+                value = tool_input.get(key)
+                if isinstance(value, str) and value:
+                    result["tool_inputs"].append(value[:200])
+
+        # Check for mkdir commands
+        cmd = tool_input.get("command", "")
+        if isinstance(cmd, str) and "mkdir" in cmd:
+            # Extract directory from mkdir command
+            match = re.search(r'mkdir\s+(?:-p\s+)?["\']?([^"\'&;]+)', cmd)
+            if match:
+                result["directories_created"].add(match.group(1).strip())
+
+
+def scan_transcript(filepath: str, result: dict):
+    """Stream a transcript once, filling result's counts, first message and tool sets."""
+    seen_user = False
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                msg = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            result["message_count"] += 1
+            msg_type = msg.get("type", "")
+            if msg_type in ("user", "assistant"):
+                result["conversation_messages"] += 1
+
+            if msg_type == "user" and not seen_user:
+                seen_user = True
+                result["first_user_message"] = first_message_text(msg)
+            elif msg_type == "assistant":
+                scan_tool_calls(msg, result)
+
+
+def scan_agent_file(filepath: str) -> dict:
+    """Parse one subagent transcript (module-level so a process pool can run it)."""
+    scan = {
+        "filepath": filepath,
+        "message_count": 0,
+        "conversation_messages": 0,
+        "first_user_message": None,
+        "files_touched": set(),
+        "directories_created": set(),
+        "tools_used": set(),
+        "tool_inputs": [],
+        "error": None,
+    }
+    try:
+        scan_transcript(filepath, scan)
+    except Exception as e:
+        scan["error"] = str(e)
+    for key in ("files_touched", "directories_created", "tools_used"):
+        scan[key] = sorted(scan[key])
+    return scan
+
+
+def agent_parent_session(path: Path) -> str:
+    """Session ID of the session that spawned a subagent transcript (None if unknown).
+
+    Newer Claude Code versions keep subagents in <session-id>/subagents/agent-*.jsonl;
+    older ones put agent-*.jsonl next to the parent and record its sessionId in each line.
+    """
+    if path.parent.name == "subagents":
+        return path.parent.parent.name
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for _, line in zip(range(5), f):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict) and record.get("sessionId"):
+                    return record["sessionId"]
+    except (OSError, UnicodeDecodeError):
+        pass
+    return None
+
+
+def find_session_files(claude_dir: Path) -> tuple:
+    """Session transcripts and their subagent transcripts.
+
+    Returns (session_files, agents_by_session, orphans): agents_by_session maps a
+    session ID to the agent-*.jsonl files it spawned; orphans counts agent files
+    whose parent session is gone.
+    """
+    session_files = []
+    agent_files = []
+    for jsonl_file in claude_dir.rglob("*.jsonl"):
+        if "agent-" in jsonl_file.name:
+            agent_files.append(jsonl_file)
+        else:
+            session_files.append(str(jsonl_file))
+
+    session_ids = {os.path.basename(fp).replace(".jsonl", "") for fp in session_files}
+    agents_by_session = defaultdict(list)
+    orphans = 0
+    for agent_file in agent_files:
+        parent = agent_parent_session(agent_file)
+        if parent in session_ids:
+            agents_by_session[parent].append(str(agent_file))
+        else:
+            orphans += 1
+
+    for paths in agents_by_session.values():
+        paths.sort()
+    return sorted(session_files), dict(agents_by_session), orphans
+
+
+def extract_session_info(filepath: str, agent_files: list = (), executor=None) -> dict:
+    """Extract key information from a session file and the subagents it spawned.
+
+    Subagent files and tools are merged into the session's own (deduplicated),
+    so classification sees the work the agents did; each agent keeps only a
+    small summary record in "agents". With an executor, sessions with many
+    subagents parse them in parallel.
+    """
 
     result = {
         "filepath": filepath,
@@ -27,6 +203,8 @@ def extract_session_info(filepath: str) -> dict:
         "files_touched": set(),
         "directories_created": set(),
         "tools_used": set(),
+        "tool_inputs": [],  # Commands/patterns/queries, used as topic terms
+        "agents": [],  # One summary per subagent transcript
         "is_agent_session": "agent-" in os.path.basename(filepath),
         "is_metadata_only": False,  # True if only file-history-snapshot, summary, etc.
         "file_size": os.path.getsize(filepath),
@@ -46,160 +224,66 @@ def extract_session_info(filepath: str) -> dict:
         return result
 
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            messages = []
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    msg = json.loads(line)
-                    messages.append(msg)
-                except json.JSONDecodeError:
-                    continue
+        scan_transcript(filepath, result)
 
-            result["message_count"] = len(messages)
-
-            # Count actual conversation messages vs metadata
-            metadata_types = {"file-history-snapshot", "summary", "progress"}
-            conversation_count = 0
-            for msg in messages:
-                msg_type = msg.get("type", "")
-                if msg_type in ("user", "assistant"):
-                    conversation_count += 1
-
-            result["conversation_messages"] = conversation_count
-            result["is_metadata_only"] = (conversation_count == 0 and len(messages) > 0)
-
-            # Find first user message
-            for msg in messages:
-                if msg.get("type") == "user":
-                    content = msg.get("message", {})
-                    if isinstance(content, dict):
-                        text = content.get("content", "")
-                        if isinstance(text, list):
-                            # Extract text from content blocks
-                            text_parts = []
-                            for block in text:
-                                if isinstance(block, dict) and block.get("type") == "text":
-                                    text_parts.append(block.get("text", ""))
-                            text = " ".join(text_parts)
-                        result["first_user_message"] = text[:500] if text else None
-                    elif isinstance(content, str):
-                        result["first_user_message"] = content[:500]
-                    break
+        # Count actual conversation messages vs metadata
+        result["is_metadata_only"] = (result["conversation_messages"] == 0 and result["message_count"] > 0)
 
-            # Extract files touched and tools used
-            for msg in messages:
-                if msg.get("type") == "assistant":
-                    content = msg.get("message", {})
-                    if isinstance(content, dict):
-                        tool_calls = content.get("content", [])
-                        if isinstance(tool_calls, list):
-                            for block in tool_calls:
-                                if isinstance(block, dict):
-                                    tool_name = block.get("name", "")
-                                    if tool_name:
-                                        result["tools_used"].add(tool_name)
-
-                                    # Extract file paths from tool inputs
-                                    tool_input = block.get("input", {})
-                                    if isinstance(tool_input, dict):
-                                        for key in ["file_path", "path", "filepath"]:
-                                            if key in tool_input:
-                                                fp = tool_input[key]
-                                                if fp:
-                                                    result["files_touched"].add(fp)
-
-                                        # Check for mkdir commands
-                                        cmd = tool_input.get("command", "")
-                                        if isinstance(cmd, str) and "mkdir" in cmd:
-                                            # Extract directory from mkdir command
-                                            match = re.search(r'mkdir\s+(?:-p\s+)?["\']?([^"\'&;]+)', cmd)
-                                            if match:
-                                                result["directories_created"].add(match.group(1).strip())
-
-            # Convert sets to lists for JSON serialization
-            result["files_touched"] = sorted(list(result["files_touched"]))
-            result["directories_created"] = sorted(list(result["directories_created"]))
-            result["tools_used"] = sorted(list(result["tools_used"]))
-
-            # Extract topics from first message and file paths
-            result["topics"] = extract_topics(result)
+        if agent_files:
+            if executor is not None and len(agent_files) >= PARALLEL_AGENT_MIN:
+                agent_scans = list(executor.map(scan_agent_file, agent_files))
+            else:
+                agent_scans = [scan_agent_file(fp) for fp in agent_files]
+
+            for scan in agent_scans:
+                result["files_touched"].update(scan["files_touched"])
+                result["directories_created"].update(scan["directories_created"])
+                result["tools_used"].update(scan["tools_used"])
+                room = MAX_TOOL_INPUTS - len(result["tool_inputs"])
+                if room > 0:
+                    result["tool_inputs"].extend(scan["tool_inputs"][:room])
+                agent = {
+                    "agent_id": os.path.basename(scan["filepath"]).replace(".jsonl", "").replace("agent-", "", 1),
+                    "message_count": scan["message_count"],
+                    "task": (scan["first_user_message"] or "")[:200],
+                    "files": len(scan["files_touched"]),
+                }
+                if scan["error"]:
+                    agent["error"] = scan["error"]
+                result["agents"].append(agent)
+
+        # Convert sets to lists for JSON serialization
+        result["files_touched"] = sorted(list(result["files_touched"]))
+        result["directories_created"] = sorted(list(result["directories_created"]))
+        result["tools_used"] = sorted(list(result["tools_used"]))
+
+        # Topics are assigned corpus-wide in main() (see topics.py)
 
     except Exception as e:
         result["error"] = str(e)
         result["files_touched"] = []
         result["directories_created"] = []
         result["tools_used"] = []
+        result["tool_inputs"] = []
 
     return result
 
-def extract_topics(session_info: dict) -> list:
-    """Extract topics from session content."""
-    topics = set()
-
-    # From first message
-    msg = session_info.get("first_user_message", "") or ""
-    msg_lower = msg.lower()
-
-    # Common tech topics
-    tech_keywords = {
-        "api": "API Development",
-        "auth": "Authentication",
-        "database": "Database",
-        "postgres": "PostgreSQL",
-        "supabase": "Supabase",
-        "react": "React",
-        "next": "Next.js",
-        "typescript": "TypeScript",
-        "python": "Python",
-        "fastapi": "FastAPI",
-        "docker": "Docker",
-        "git": "Git",
-        "deploy": "Deployment",
-        "test": "Testing",
-        "debug": "Debugging",
-        "refactor": "Refactoring",
-        "css": "CSS/Styling",
-        "tailwind": "Tailwind CSS",
-        "ui": "UI Design",
-        "ux": "UX Design",
-        "setup": "Setup/Configuration",
-        "install": "Installation",
-        "config": "Configuration",
-        "mcp": "MCP Servers",
-        "claude": "Claude/AI",
-        "agent": "AI Agents",
-        "scrape": "Web Scraping",
-        "automation": "Automation",
-        "square": "Square API",
-        "payment": "Payments",
-    }
 
-    for keyword, topic in tech_keywords.items():
-        if keyword in msg_lower:
-            topics.add(topic)
-
-    # From file paths
-    for fp in session_info.get("files_touched", []):
-        fp_lower = fp.lower()
-        if ".py" in fp_lower:
-            topics.add("Python")
-        if ".ts" in fp_lower or ".tsx" in fp_lower:
-            topics.add("TypeScript")
-        if ".js" in fp_lower or ".jsx" in fp_lower:
-            topics.add("JavaScript")
-        if "component" in fp_lower:
-            topics.add("React Components")
-        if "api" in fp_lower:
-            topics.add("API Development")
-        if "test" in fp_lower:
-            topics.add("Testing")
-        if ".md" in fp_lower:
-            topics.add("Documentation")
-
-    return sorted(list(topics))
+def extract_all_sessions(session_files: list, agents_by_session: dict) -> list:
+    """extract_session_info for every session, with one shared process pool for subagent-heavy sessions."""
+
+    def extract_all(executor=None):
+        return [extract_session_info(fp, agents_by_session.get(os.path.basename(fp).replace(".jsonl", ""), ()), executor)
+                for fp in session_files]
+
+    if (os.cpu_count() or 1) < 2 or \
+            not any(len(agents) >= PARALLEL_AGENT_MIN for agents in agents_by_session.values()):
+        return extract_all()
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor() as executor:
+        return extract_all(executor)
+
 
 def load_config():
     """Load Goldfish config.yaml."""
@@ -233,41 +317,29 @@ EXCLUDED_DIRS = {
 EXCLUDED_PATTERNS = {".py", ".md", ".json", ".yaml", ".yml", ".js", ".ts", ".tsx", ".jsx", ".sh", ".jsonl"}
 
 
-def classify_session(session_info: dict) -> dict:
-    """Classify session into vault and project using config rules."""
-
-    msg = (session_info.get("first_user_message", "") or "").lower()
-    files = session_info.get("files_touched", [])
-
-    config = load_config()
-    consolidation_rules = config.get("consolidation_rules", [])
-    vaults_config = config.get("vaults", {})
+def build_alias_map(config: dict) -> dict:
+    """Build alias.lower() -> (project_name, vault) mapping from config rules."""
     default_vault = config.get("default_vault", "personal")
-
-    classification = {
-        "vault": default_vault,
-        "project": "UNCLEAR",
-        "confidence": 50,
-        "reasoning": ""
-    }
-
-    # Build alias-to-project mapping from config
-    alias_map = {}  # alias.lower() -> (project_name, vault)
-    for rule in consolidation_rules:
+    alias_map = {}
+    for rule in config.get("consolidation_rules", []):
         project_name = rule.get("name", "").lower()
         vault = rule.get("vault", default_vault)
         alias_map[project_name] = (project_name, vault)
         for alias in rule.get("aliases", []):
             alias_map[alias.lower()] = (project_name, vault)
+    return alias_map
 
-    # Extract potential project names from file paths
+
+def extract_project_candidates(files: list) -> dict:
+    """Count potential project names found in file path components."""
+    excluded = {d.lower() for d in EXCLUDED_DIRS}
     project_candidates = defaultdict(int)
     for fp in files:
         parts = fp.split("/")
         for part in parts:
             part_lower = part.lower()
             # Skip excluded directories and short/hidden names
-            if part_lower in {d.lower() for d in EXCLUDED_DIRS}:
+            if part_lower in excluded:
                 continue
             if part.startswith(".") or part.startswith("-") or len(part) <= 2:
                 continue
@@ -281,6 +353,36 @@ def classify_session(session_info: dict) -> dict:
             if part_lower[0].isdigit():
                 continue
             project_candidates[part_lower] += 1
+    return project_candidates
+
+
+def classify_session(session_info: dict, config: dict = None, project_candidates: dict = None) -> dict:
+    """Classify session into vault and project using config rules.
+
+    project_candidates can be passed in when the caller already extracted them.
+    """
+
+    msg = (session_info.get("first_user_message", "") or "").lower()
+    files = session_info.get("files_touched", [])
+
+    if config is None:
+        config = load_config()
+    vaults_config = config.get("vaults", {})
+    default_vault = config.get("default_vault", "personal")
+
+    classification = {
+        "vault": default_vault,
+        "project": "UNCLEAR",
+        "confidence": 50,
+        "reasoning": ""
+    }
+
+    # Build alias-to-project mapping from config
+    alias_map = build_alias_map(config)
+
+    # Extract potential project names from file paths
+    if project_candidates is None:
+        project_candidates = extract_project_candidates(files)
 
     # First priority: check if any candidate matches a known alias
     for candidate, count in sorted(project_candidates.items(), key=lambda x: -x[1]):
@@ -448,6 +550,228 @@ def extract_research_topic(message: str) -> str:
 
     return ""
 
+# Classification cache (machine-local: sessions live in this machine's ~/.claude)
+CLASSIFICATION_CACHE_PATH = Path.home() / ".goldfish" / "state" / "classification-cache.json"
+CLASSIFICATION_CACHE_VERSION = 2
+
+
+def _fingerprint(value) -> str:
+    """Stable short hash of any JSON-serializable value."""
+    data = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def classification_input_fingerprint(session_info: dict) -> str:
+    """Fingerprint the session fields classify_session() actually reads."""
+    return _fingerprint([
+        session_info.get("first_user_message") or "",
+        session_info.get("files_touched", []),
+        session_info.get("conversation_messages", 0),
+    ])
+
+
+def config_snapshot(config: dict) -> dict:
+    """Extract the parts of config that influence classification."""
+    return {
+        "default_vault": config.get("default_vault", "personal"),
+        "aliases": {alias: list(target) for alias, target in build_alias_map(config).items()},
+        "vault_keywords": {
+            vault_name: [kw.lower() for kw in vault_config.get("keywords", [])]
+            for vault_name, vault_config in config.get("vaults", {}).items()
+        },
+    }
+
+
+def diff_config_snapshots(old: dict, new: dict) -> tuple:
+    """Compare two config snapshots.
+
+    Returns (full_rebuild, changed_terms). changed_terms holds every alias or
+    vault keyword that was added, removed or remapped.
+    """
+    if not old or old.get("default_vault") != new.get("default_vault"):
+        return (True, set())
+
+    # Vault keyword priority follows vault order, so reordering is a full rebuild
+    if list(old.get("vault_keywords", {})) != list(new.get("vault_keywords", {})):
+        return (True, set())
+
+    changed = set()
+    old_aliases = old.get("aliases", {})
+    new_aliases = new.get("aliases", {})
+    for alias in set(old_aliases) | set(new_aliases):
+        if old_aliases.get(alias) != new_aliases.get(alias):
+            changed.add(alias)
+
+    # The first alias found in a message wins, so rule order matters too (the
+    # snapshot keeps rule order; JSON preserves it). Any pair of aliases whose
+    # relative order flipped has at least one member at a new position.
+    old_order = [alias for alias in old_aliases if alias in new_aliases]
+    new_order = [alias for alias in new_aliases if alias in old_aliases]
+    for old_alias, new_alias in zip(old_order, new_order):
+        if old_alias != new_alias:
+            changed.update((old_alias, new_alias))
+
+    for vault_name in new.get("vault_keywords", {}):
+        old_keywords = set(old["vault_keywords"].get(vault_name, []))
+        new_keywords = set(new["vault_keywords"].get(vault_name, []))
+        changed |= old_keywords ^ new_keywords
+
+    return (False, changed)
+
+
+def build_alias_index(cached_sessions: dict) -> dict:
+    """Reverse index: path candidate -> session IDs whose files contain it."""
+    index = defaultdict(set)
+    for session_id, entry in cached_sessions.items():
+        for candidate in entry.get("candidates", []):
+            index[candidate].add(session_id)
+    return index
+
+
+def find_affected_sessions(terms: set, cached_sessions: dict, messages: dict) -> set:
+    """Find sessions whose classification could change because of `terms`.
+
+    Path candidates are exact matches, so they come from the reverse index.
+    Messages are matched by substring (same as classify_session), so only
+    the changed terms are scanned against them.
+    """
+    if not terms:
+        return set()
+
+    index = build_alias_index(cached_sessions)
+    affected = set()
+    for term in terms:
+        affected |= index.get(term, set())
+
+    for session_id, msg in messages.items():
+        if any(term in msg for term in terms):
+            affected.add(session_id)
+
+    return affected
+
+
+def load_classification_cache() -> dict:
+    """Load cached classifications, discarding caches from older versions."""
+    if CLASSIFICATION_CACHE_PATH.exists():
+        try:
+            with open(CLASSIFICATION_CACHE_PATH) as f:
+                cache = json.load(f)
+            if cache.get("version") == CLASSIFICATION_CACHE_VERSION:
+                return cache
+        except (json.JSONDecodeError, OSError):
+            pass
+    return {"version": CLASSIFICATION_CACHE_VERSION, "config": None, "sessions": {}}
+
+
+def save_classification_cache(cache: dict):
+    """Save cached classifications."""
+    CLASSIFICATION_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(CLASSIFICATION_CACHE_PATH, 'w') as f:
+        json.dump(cache, f)
+
+
+def classify_sessions_cached(session_infos: list, config: dict = None) -> tuple:
+    """Classify sessions, re-running classify_session() only where needed.
+
+    A session is re-classified when its extracted info changed, when it is
+    new, or when a config change touched an alias/keyword that appears in
+    its path candidates or first message.
+
+    Returns (classifications, moves, stats) where classifications maps
+    session_id -> classification and moves lists sessions whose project or
+    vault changed since the last run.
+    """
+    if config is None:
+        config = load_config()
+
+    cache = load_classification_cache()
+    cached_sessions = cache.get("sessions", {})
+    cold = not cache.get("config")
+    snapshot = config_snapshot(config)
+    full_rebuild, changed_terms = diff_config_snapshots(cache.get("config"), snapshot)
+
+    messages = {
+        info["session_id"]: (info.get("first_user_message") or "").lower()
+        for info in session_infos
+    }
+    affected = set() if full_rebuild else find_affected_sessions(changed_terms, cached_sessions, messages)
+
+    classifications = {}
+    moves = []
+    new_cache_sessions = {}
+    stats = {"cached": 0, "classified": 0, "cold": cold,
+             "config_affected": len(session_infos) if full_rebuild and not cold else 0}
+
+    for info in session_infos:
+        session_id = info["session_id"]
+        input_fp = classification_input_fingerprint(info)
+        entry = cached_sessions.get(session_id)
+
+        if entry and entry.get("inputs") == input_fp and "candidates" in entry:
+            candidates = entry["candidates"]
+        else:
+            candidates = extract_project_candidates(info.get("files_touched", []))
+
+        if entry and not full_rebuild and entry.get("inputs") == input_fp and session_id not in affected:
+            classification = entry["classification"]
+            stats["cached"] += 1
+        else:
+            classification = classify_session(info, config, candidates)
+            stats["classified"] += 1
+            if session_id in affected:
+                stats["config_affected"] += 1
+
+            old = entry.get("classification") if entry else None
+            if old and (old.get("project"), old.get("vault")) != (classification["project"], classification["vault"]):
+                moves.append({
+                    "session_id": session_id,
+                    "from": {"project": old.get("project"), "vault": old.get("vault")},
+                    "to": {"project": classification["project"], "vault": classification["vault"]},
+                })
+
+        classifications[session_id] = classification
+        new_cache_sessions[session_id] = {
+            "inputs": input_fp,
+            "candidates": dict(candidates),  # candidate -> count, in path order
+            "classification": classification,
+        }
+
+    cache["config"] = snapshot
+    cache["sessions"] = new_cache_sessions
+    save_classification_cache(cache)
+
+    return (classifications, moves, stats)
+
+
+SESSION_MOVES_PATH = Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish" / ".goldfish" / "session-moves.json"
+
+
+def save_session_moves(moves: list):
+    """Queue moved sessions so this machine's appender can relocate their large.md entries."""
+    moves_path = own_shard(SESSION_MOVES_PATH)
+    pending = {}
+    if moves_path.exists():
+        try:
+            with open(moves_path) as f:
+                for move in json.load(f):
+                    pending[move["session_id"]] = move
+        except (json.JSONDecodeError, OSError, KeyError):
+            pass
+
+    for move in moves:
+        previous = pending.get(move["session_id"])
+        if previous:
+            # Keep the original source so a session that moves twice is relocated once
+            move = {**move, "from": previous["from"]}
+        if move["from"] == move["to"]:
+            pending.pop(move["session_id"], None)
+        else:
+            pending[move["session_id"]] = move
+
+    with open(moves_path, 'w') as f:
+        json.dump(list(pending.values()), f, indent=2)
+
+
 def format_session_report(session_info: dict, classification: dict) -> str:
     """Format a session analysis report."""
 
@@ -497,6 +821,15 @@ def format_session_report(session_info: dict, classification: dict) -> str:
             lines.append(f"  - {d}")
         lines.append("")
 
+    if session_info.get("agents"):
+        lines.append(f"SUBAGENTS ({len(session_info['agents'])}, files and tools merged above):")
+        for agent in session_info["agents"][:5]:
+            task = agent["task"][:80].replace("\n", " ").strip()
+            lines.append(f"  - {agent['agent_id']}: {agent['message_count']} messages, {agent['files']} files \"{task}\"")
+        if len(session_info["agents"]) > 5:
+            lines.append(f"  ... and {len(session_info['agents']) - 5} more")
+        lines.append("")
+
     lines.append("READER ASSESSMENT:")
     lines.append(f"  Project: {classification['project']}")
     lines.append(f"  Vault: {classification['vault']}")
@@ -512,26 +845,23 @@ def main():
     # Find all session files
     claude_dir = Path.home() / ".claude" / "projects"
 
-    session_files = []
-    for jsonl_file in claude_dir.rglob("*.jsonl"):
-        # Skip agent sessions for main analysis
-        if "agent-" not in jsonl_file.name:
-            session_files.append(str(jsonl_file))
+    # Subagent transcripts (agent-*.jsonl) are parsed together with their parent session
+    session_files, agents_by_session, orphan_agents = find_session_files(claude_dir)
+    agent_count = sum(len(agents) for agents in agents_by_session.values())
 
     # Note: Skip history.jsonl - it's a session index with a different format, not a transcript
 
     print(f"\n{'═' * 60}")
     print("           🐠 GOLDFISH READER ANALYSIS")
     print(f"{'═' * 60}")
-    print(f"\nFound {len(session_files)} session files to analyze\n")
+    print(f"\nFound {len(session_files)} session files to analyze "
+          f"(+{agent_count} subagent transcripts in {len(agents_by_session)} sessions)\n")
 
-    all_sessions = []
+    session_infos = []
     skipped_metadata = 0
     skipped_empty = 0
 
-    for filepath in sorted(session_files):
-        session_info = extract_session_info(filepath)
-
+    for session_info in extract_all_sessions(session_files, agents_by_session):
         # Skip metadata-only sessions (file-history-snapshot, etc.)
         if session_info.get("is_metadata_only"):
             skipped_metadata += 1
@@ -542,7 +872,17 @@ def main():
             skipped_empty += 1
             continue
 
-        classification = classify_session(session_info)
+        session_infos.append(session_info)
+
+    # Classify (reuses cached results unless inputs or relevant config changed)
+    classifications, moves, cache_stats = classify_sessions_cached(session_infos)
+
+    # Topics are TF-IDF weighted against the whole session corpus
+    topic_stats = topics.process_sessions(session_infos, classifications, EXCLUDED_DIRS)
+
+    all_sessions = []
+    for session_info in session_infos:
+        classification = classifications[session_info["session_id"]]
 
         # Store for later
         all_sessions.append({
@@ -556,6 +896,23 @@ def main():
 
     if skipped_metadata or skipped_empty:
         print(f"Skipped: {skipped_metadata} metadata-only, {skipped_empty} empty/abandoned")
+    if orphan_agents:
+        print(f"Skipped: {orphan_agents} subagent transcripts whose parent session is gone")
+
+    if cache_stats["cold"]:
+        print(f"Classification: cold cache, {cache_stats['classified']} classified")
+    else:
+        print(f"Classification: {cache_stats['cached']} cached, {cache_stats['classified']} classified "
+              f"({cache_stats['config_affected']} due to config changes)")
+    print(f"Topics: {topic_stats['retokenized']} sessions re-tokenized, "
+          f"{topic_stats['terms']} terms across {topic_stats['sessions']} sessions")
+
+    if moves:
+        print(f"\nSessions moved between projects: {len(moves)}")
+        for move in moves:
+            print(f"  {move['session_id'][:8]}... {move['from']['vault']}/{move['from']['project']}"
+                  f" -> {move['to']['vault']}/{move['to']['project']}")
+        save_session_moves(moves)
 
     # Summary
     print(f"\n{'═' * 60}")
@@ -579,8 +936,8 @@ def main():
     for project, sessions in sorted(by_project.items()):
         print(f"  {project}: {len(sessions)} sessions")
 
-    # Save results
-    output_path = Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish" / ".goldfish" / "session-analysis.json"
+    # Save results (this machine's shard - other machines analyse their own sessions)
+    output_path = own_shard(Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish" / ".goldfish" / "session-analysis.json")
 
     # Convert to JSON-serializable format
     json_sessions = []
@@ -589,6 +946,7 @@ def main():
             "info": {
                 k: v if not isinstance(v, set) else list(v)
                 for k, v in s["info"].items()
+                if k != "tool_inputs"
             },
             "classification": s["classification"]
         })
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Goldfish Transcript Renderer
+
+Streams a Claude Code session .jsonl into a compact markdown transcript for
+large.md. Opt-in via the "transcripts" section of ~/.goldfish/config.json.
+
+Keeps memory bounded (one record at a time) and keeps output small:
+- snapshot/summary/progress/meta records are skipped
+- thinking blocks are dropped
+- tool calls become one line, bulky tool results are truncated
+- re-reads of the same file and identical tool outputs are collapsed
+- rendering stops at a per-session token budget (~4 chars per token)
+
+With a blob store, every output that gets truncated (and file contents) is
+stored whole in the vault's content-addressed store and referenced as
+[blob:<hash>], so nothing is lost to truncation and repeats cost nothing.
+Blobs are only stored for lines that make it into the transcript.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+from blobstore import blob_digest
+
+CONFIG_PATH = Path.home() / ".goldfish" / "config.json"
+
+DEFAULT_SETTINGS = {
+    "full": False,
+    "token_budget": 6000,
+    "tool_output_chars": 600,
+}
+
+CHARS_PER_TOKEN = 4
+
+# Which tool input field best describes a call, per tool
+TOOL_SUMMARY_KEYS = {
+    "Read": "file_path",
+    "Write": "file_path",
+    "Edit": "file_path",
+    "MultiEdit": "file_path",
+    "NotebookEdit": "notebook_path",
+    "Bash": "command",
+    "Grep": "pattern",
+    "Glob": "pattern",
+    "WebFetch": "url",
+    "WebSearch": "query",
+    "Task": "description",
+}
+
+
+def load_settings() -> dict:
+    """Load the "transcripts" section of ~/.goldfish/config.json."""
+    settings = dict(DEFAULT_SETTINGS)
+    if CONFIG_PATH.exists():
+        try:
+            with open(CONFIG_PATH) as f:
+                settings.update(json.load(f).get("transcripts", {}))
+        except (json.JSONDecodeError, OSError):
+            pass
+    return settings
+
+
+def escape_markdown(text: str) -> str:
+    """Stop transcript text from looking like a large.md entry boundary."""
+    lines = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped == "---":
+            line = "- - -"
+        elif stripped.startswith("## Session:"):
+            line = "\\" + stripped
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def one_line(text: str, limit: int) -> str:
+    """Collapse whitespace and cut to limit characters."""
+    text = " ".join(str(text).split())
+    if len(text) > limit:
+        return text[:limit] + "…"
+    return text
+
+
+def truncate(text: str, limit: int) -> str:
+    """Keep the head of a bulky block and note how much was dropped."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit].rstrip()}\n… [+{len(text) - limit} chars truncated]"
+
+
+def block_text(content) -> str:
+    """Flatten message content (string or list of blocks) into plain text."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "text":
+                parts.append(block.get("text", ""))
+            elif isinstance(block, str):
+                parts.append(block)
+        return "\n".join(parts)
+    return ""
+
+
+def summarize_tool_call(block: dict) -> str:
+    """One-line description of a tool_use block."""
+    name = block.get("name", "tool")
+    tool_input = block.get("input", {})
+    if not isinstance(tool_input, dict):
+        return name
+    key = TOOL_SUMMARY_KEYS.get(name)
+    value = tool_input.get(key) if key else None
+    if value is None:
+        for fallback in ("file_path", "path", "command", "pattern", "url", "query"):
+            if tool_input.get(fallback):
+                value = tool_input[fallback]
+                break
+    if value:
+        return f"{name} `{one_line(value, 160)}`"
+    return name
+
+
+class TranscriptRenderer:
+    """Incrementally renders records; stops accepting output past the budget."""
+
+    def __init__(self, token_budget: int, tool_output_chars: int,
+                 blob_store=None, session_id: str = ""):
+        self.char_budget = token_budget * CHARS_PER_TOKEN
+        self.tool_output_chars = tool_output_chars
+        self.blob_store = blob_store
+        self.session_id = session_id
+        self.used = 0
+        self.lines = []
+        self.exhausted = False
+        self.pending_tools = {}    # tool_use_id -> (name, file_path, is_reread)
+        self.files_read = set()
+        self.seen_outputs = set()
+        self.stats = {"messages": 0, "tool_calls": 0, "folded_outputs": 0, "truncated_outputs": 0, "blobs": 0}
+
+    def emit(self, text: str) -> bool:
+        """Add text if it fits the budget. Returns False once the budget is spent."""
+        if self.exhausted:
+            return False
+        if self.used + len(text) > self.char_budget:
+            remaining = self.char_budget - self.used
+            if remaining > 200:
+                self.lines.append(text[:remaining].rstrip() + " …")
+            self.exhausted = True
+            return False
+        self.lines.append(text)
+        self.used += len(text) + 1
+        return True
+
+    def add_record(self, record: dict):
+        """Render one jsonl record (user or assistant)."""
+        record_type = record.get("type")
+        if record_type not in ("user", "assistant") or record.get("isMeta"):
+            return
+
+        message = record.get("message", {})
+        content = message.get("content", "") if isinstance(message, dict) else message
+
+        if record_type == "user":
+            self._add_user(content)
+        else:
+            self._add_assistant(content)
+
+    def _add_user(self, content):
+        if isinstance(content, list):
+            for block in content:
+                if isinstance(block, dict) and block.get("type") == "tool_result":
+                    self._add_tool_result(block)
+        text = block_text(content).strip()
+        if text:
+            self.stats["messages"] += 1
+            self.emit(f"\n**User:** {escape_markdown(text)}")
+
+    def _add_assistant(self, content):
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        if not isinstance(content, list):
+            return
+        for block in content:
+            if not isinstance(block, dict):
+                continue
+            if block.get("type") == "text" and block.get("text", "").strip():
+                self.stats["messages"] += 1
+                self.emit(f"\n**Claude:** {escape_markdown(block['text'].strip())}")
+            elif block.get("type") == "tool_use":
+                self._add_tool_call(block)
+
+    def _add_tool_call(self, block: dict):
+        self.stats["tool_calls"] += 1
+        name = block.get("name", "")
+        tool_input = block.get("input", {}) if isinstance(block.get("input"), dict) else {}
+        file_path = tool_input.get("file_path") if name == "Read" else None
+
+        note = ""
+        if file_path:
+            if file_path in self.files_read:
+                note = " (re-read)"
+            self.files_read.add(file_path)
+        self.pending_tools[block.get("id", "")] = (name, file_path, bool(note))
+        self.emit(f"- → {summarize_tool_call(block)}{note}")
+
+    def _add_tool_result(self, block: dict):
+        name, file_path, is_reread = self.pending_tools.pop(block.get("tool_use_id", ""), ("", None, False))
+        output = block.get("content", "")
+        if not isinstance(output, str):
+            output = block_text(output)
+        output = output.strip()
+        if not output:
+            return
+
+        if is_reread:
+            self.stats["folded_outputs"] += 1
+            return
+
+        digest = hashlib.sha1(output.encode("utf-8", "replace")).hexdigest()
+        if digest in self.seen_outputs:
+            self.stats["folded_outputs"] += 1
+            self.emit("  ⎿ (same output as earlier)")
+            return
+        self.seen_outputs.add(digest)
+
+        blob_ref = ""
+        if self.blob_store is not None and (name == "Read" or len(output) > self.tool_output_chars):
+            blob_ref = f" [blob:{blob_digest(output)}]"
+
+        if name == "Read":
+            # File contents are recoverable from the repo (or the blob); a line count is enough
+            self.stats["folded_outputs"] += 1
+            self._emit_with_blob(f"  ⎿ ({output.count(chr(10)) + 1} lines){blob_ref}", blob_ref, output)
+            return
+
+        if len(output) > self.tool_output_chars:
+            self.stats["truncated_outputs"] += 1
+        body = escape_markdown(truncate(output, self.tool_output_chars))
+        prefix = "  ⎿ [error] " if block.get("is_error") else "  ⎿ "
+        self._emit_with_blob(prefix + body.replace("\n", "\n    ") + blob_ref, blob_ref, output)
+
+    def _emit_with_blob(self, text: str, blob_ref: str, output: str):
+        """Emit a line, storing its blob only if the reference made it into the transcript."""
+        if self.emit(text) and blob_ref:
+            self.blob_store.put(output, self.session_id)
+            self.stats["blobs"] += 1
+
+
+def render_session_file(filepath: str, token_budget: int = None, tool_output_chars: int = None,
+                        blob_store=None, session_id: str = "") -> tuple:
+    """Stream a session .jsonl into markdown.
+
+    Returns (markdown, stats). Reads one line at a time and stops parsing as
+    soon as the token budget is spent, so huge sessions cost little.
+    """
+    settings = load_settings()
+    renderer = TranscriptRenderer(
+        token_budget or settings["token_budget"],
+        tool_output_chars or settings["tool_output_chars"],
+        blob_store=blob_store,
+        session_id=session_id,
+    )
+
+    skipped_lines = 0
+    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if renderer.exhausted:
+                skipped_lines += 1
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            renderer.add_record(record)
+
+    stats = dict(renderer.stats)
+    stats["chars"] = renderer.used
+    stats["budget_exhausted"] = renderer.exhausted
+    stats["skipped_records"] = skipped_lines
+
+    if renderer.exhausted:
+        renderer.lines.append(f"\n*… token budget reached; {skipped_lines} more records in the raw session file*")
+
+    return ("\n".join(renderer.lines).strip("\n"), stats)
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Goldfish Similarity Index
+
+Precomputes near-duplicate candidates for the DUPER agent so /gfsave doesn't
+have to load all of large.md into context.
+
+Each session is shingled (word 3-grams of its large.md entry with the entry
+template stripped, plus its file set) into a MinHash signature. Signatures are
+computed from the entry alone, so every indexing path gives the same result. Signatures live in an LSH
+index per project (goldfish/similarity-index.<machine>.json) that the
+appender updates as sessions are appended. Queries merge every machine's
+index. Sessions sharing an LSH band are candidates; their estimated Jaccard
+similarity decides whether they're reported.
+
+Usage:
+  similarity.py candidates <project_dir> [--new] [--threshold 0.5]
+      Clusters of near-duplicate/related sessions as JSON. --new limits the
+      output to clusters containing sessions still pending in the inbox.
+      Sessions missing from every machine's index (e.g. history from before
+      the index existed) are indexed first, so upgrades need no extra step.
+  similarity.py facts <project_dir> [--threshold 0.6]
+      Near-duplicate bullet points across small.md and medium.md as JSON.
+  similarity.py rebuild <project_dir>
+      Re-index every session in large.md and the archive.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from history import entry_date, SESSION_PREFIX_CHARS
+from machine import own_shard, load_json_shards
+import inbox
+
+INDEX_FILE = "similarity-index.json"
+INDEX_VERSION = 3
+
+# A pair shares at least one band with probability 1 - (1 - J^ROWS)^BANDS. With
+# 32 bands x 2 rows that is ~0.95 at J=0.3, ~0.996 at 0.4 and ~0.9999 at 0.5, so
+# pairs at or above the default thresholds are scored; the price is more
+# low-similarity collisions, which only cost a signature comparison each.
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Fixed permutations so signatures stay comparable across runs and machines
+_seed = hashlib.sha256(b"goldfish-minhash").digest()
+PERMUTATIONS = []
+for _i in range(NUM_PERM):
+    _h = hashlib.sha256(_seed + _i.to_bytes(2, "big")).digest()
+    PERMUTATIONS.append((int.from_bytes(_h[:8], "big") % MERSENNE_PRIME or 1,
+                         int.from_bytes(_h[8:16], "big") % MERSENNE_PRIME))
+
+WORD_RE = re.compile(r"[a-z0-9_./-]{2,}")
+BLOB_RE = re.compile(r"\[blob:[0-9a-f]+\]")
+
+# Entry template text every session shares (headers, counts, tool names, file
+# bullets - files get their own shingles). Left in, it adds ~0.14 Jaccard
+# between unrelated sessions.
+TEMPLATE_LINE_RE = re.compile(
+    r"^(?:## Session: .*|\*\*(?:Date|Messages|Tools|Subagents):\*\*.*|- `[^`]+`|- \.\.\. and \d+ more"
+    r"|\*Raw transcript in .*\*|---)[ \t]*$", re.MULTILINE)
+TEMPLATE_LABEL_RE = re.compile(r"\*\*(?:First message|Files touched|Transcript|User|Claude):\*\*")
+
+
+# ---------------------------------------------------------------------------
+# Shingling and MinHash
+# ---------------------------------------------------------------------------
+
+def shingles(text: str, files: list = None) -> set:
+    """Word n-gram shingles of text plus one shingle per file path."""
+    words = WORD_RE.findall(BLOB_RE.sub(" ", text.lower()))
+    result = set()
+    if len(words) < SHINGLE_SIZE:
+        result.update(words)
+    for i in range(len(words) - SHINGLE_SIZE + 1):
+        result.add(" ".join(words[i:i + SHINGLE_SIZE]))
+    for fp in files or []:
+        result.add("file:" + fp)
+    return result
+
+
+def minhash(shingle_set: set) -> list:
+    """MinHash signature (NUM_PERM 32-bit values) of a shingle set."""
+    if not shingle_set:
+        return [MAX_HASH] * NUM_PERM
+    hashed = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingle_set]
+    signature = []
+    for a, b in PERMUTATIONS:
+        signature.append(min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashed))
+    return signature
+
+
+def estimate_similarity(sig_a: list, sig_b: list) -> float:
+    """Estimated Jaccard similarity: share of matching signature slots."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def band_keys(signature: list) -> list:
+    """LSH bucket key for each band of a signature."""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(chunk).encode(), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+
+def entry_files(entry: str) -> list:
+    """File paths listed under **Files touched:** in a large.md entry."""
+    return re.findall(r"^- `([^`]+)`$", entry, flags=re.MULTILINE)
+
+
+def entry_text(entry: str) -> str:
+    """The session's own text in a large.md entry, without the entry template."""
+    return TEMPLATE_LABEL_RE.sub(" ", TEMPLATE_LINE_RE.sub("", entry))
+
+
+def entry_first_message(entry: str) -> str:
+    """The quoted first message of a large.md entry."""
+    match = re.search(r"\*\*First message:\*\*\n> (.*)", entry)
+    return match.group(1).strip() if match else ""
+
+
+# ---------------------------------------------------------------------------
+# Per-project LSH index
+# ---------------------------------------------------------------------------
+
+def upgrade_index(index: dict) -> bool:
+    """Whether an index can be used as is.
+
+    Indexes before version 3 shingled the entry template too, so their
+    signatures aren't comparable with new ones. They're dropped, and the
+    sessions are re-indexed by load_merged_index()'s backfill.
+    """
+    return index.get("version") == INDEX_VERSION
+
+
+def load_index(project_path: Path) -> dict:
+    """Load this machine's similarity index for a project."""
+    index_path = own_shard(project_path / "goldfish" / INDEX_FILE)
+    if index_path.exists():
+        with open(index_path) as f:
+            index = json.load(f)
+        if upgrade_index(index):
+            return index
+    return {"version": INDEX_VERSION, "sessions": {}, "buckets": {}}
+
+
+def load_merged_index(project_path: Path) -> dict:
+    """Every machine's index for a project, limited to sessions still in its history."""
+    from archive import session_prefixes
+    live = session_prefixes(project_path)
+
+    index = {"version": INDEX_VERSION, "sessions": {}, "buckets": {}}
+    for _, shard in load_json_shards(project_path / "goldfish" / INDEX_FILE):
+        if not upgrade_index(shard):
+            continue
+        for prefix, session in shard["sessions"].items():
+            if prefix in live:
+                index["sessions"][prefix] = session
+
+    # Sessions no machine has indexed (history from before the index existed,
+    # or hand-edited large.md) are indexed now, once, into this machine's shard
+    missing = live - set(index["sessions"])
+    if missing:
+        index["backfilled"] = index_missing(project_path, missing)
+        own = load_index(project_path)
+        for prefix in missing:
+            if prefix in own["sessions"]:
+                index["sessions"][prefix] = own["sessions"][prefix]
+
+    for prefix, session in index["sessions"].items():
+        for key in session["bands"]:
+            index["buckets"].setdefault(key, []).append(prefix)
+    return index
+
+
+def save_index(project_path: Path, index: dict):
+    """Write this machine's index atomically."""
+    index_path = own_shard(project_path / "goldfish" / INDEX_FILE)
+    tmp_path = index_path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+
+
+def add_to_index(index: dict, session_id: str, entry: str):
+    """Insert (or replace) one session in the LSH index."""
+    prefix = session_id[:SESSION_PREFIX_CHARS]
+    remove_from_index(index, prefix)
+
+    first_message = entry_first_message(entry)
+    signature = minhash(shingles(entry_text(entry), entry_files(entry)))
+    keys = band_keys(signature)
+    index["sessions"][prefix] = {
+        "date": entry_date(entry),
+        "first_message": first_message[:160],
+        "signature": signature,
+        "bands": keys,
+    }
+    for key in keys:
+        index["buckets"].setdefault(key, []).append(prefix)
+
+
+def remove_from_index(index: dict, prefix: str):
+    """Drop a session from the index (e.g. when it's relocated)."""
+    old = index["sessions"].pop(prefix, None)
+    if not old:
+        return
+    for key in old["bands"]:
+        members = index["buckets"].get(key, [])
+        if prefix in members:
+            members.remove(prefix)
+        if not members:
+            index["buckets"].pop(key, None)
+
+
+# Indexes modified during this run, saved together by save_all()
+_open_indexes = {}
+
+
+def _cached_index(project_path: Path) -> dict:
+    if project_path not in _open_indexes:
+        _open_indexes[project_path] = load_index(project_path)
+    return _open_indexes[project_path]
+
+
+def add_session(project_path: Path, session: dict, entry: str):
+    """Index a session the appender just wrote. Call save_all() when done."""
+    add_to_index(_cached_index(project_path), session.get("session_id", ""), entry)
+
+
+def move_session(session_id: str, source_path: Path, target_path: Path, entry: str):
+    """Move a relocated session from one project's index to another's."""
+    remove_from_index(_cached_index(source_path), session_id[:SESSION_PREFIX_CHARS])
+    add_to_index(_cached_index(target_path), session_id, entry)
+
+
+def save_all():
+    """Persist every index touched by add_session()/move_session()."""
+    for project_path, index in _open_indexes.items():
+        save_index(project_path, index)
+    _open_indexes.clear()
+
+
+def index_missing(project_path: Path, prefixes: set) -> int:
+    """Add the given sessions from the project's history to this machine's index."""
+    from archive import iter_history
+    index = load_index(project_path)
+    count = 0
+    for prefix, _, entry, _ in iter_history(project_path):
+        if prefix in prefixes:
+            add_to_index(index, prefix, entry)
+            count += 1
+    if count:
+        save_index(project_path, index)
+    return count
+
+
+def rebuild(project_path: Path) -> int:
+    """Re-index every session in both tiers into this machine's index."""
+    from archive import iter_history
+    index = {"version": INDEX_VERSION, "sessions": {}, "buckets": {}}
+    count = 0
+    for prefix, _, entry, _ in iter_history(project_path):
+        add_to_index(index, prefix, entry)
+        count += 1
+    save_index(project_path, index)
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Candidate clusters
+# ---------------------------------------------------------------------------
+
+def candidate_pairs(index: dict, threshold: float) -> list:
+    """(a, b, similarity) for every LSH-colliding pair above threshold."""
+    sessions = index["sessions"]
+    seen = set()
+    pairs = []
+    for members in index["buckets"].values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                key = (a, b) if a < b else (b, a)
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = estimate_similarity(sessions[a]["signature"], sessions[b]["signature"])
+                if score >= threshold:
+                    pairs.append((key[0], key[1], score))
+    return pairs
+
+
+def cluster_pairs(pairs: list) -> list:
+    """Group pairs into connected clusters (union-find)."""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b, _ in pairs:
+        parent[find(a)] = find(b)
+
+    clusters = {}
+    for a, b, score in pairs:
+        clusters.setdefault(find(a), []).append((a, b, score))
+    return list(clusters.values())
+
+
+def pending_sessions(project_path: Path) -> set:
+    """Session prefixes still pending in the project's inbox (every machine's shard)."""
+    return {prefix for prefix, _ in inbox.pending_sessions(project_path)}
+
+
+def find_candidates(project_path: Path, threshold: float = 0.5, only_new: bool = False) -> dict:
+    """Near-duplicate/related session clusters for DUPER, most similar first."""
+    index = load_merged_index(project_path)
+    sessions = index["sessions"]
+    pending = pending_sessions(project_path) if only_new else None
+
+    clusters = []
+    for cluster in cluster_pairs(candidate_pairs(index, threshold)):
+        members = sorted({s for a, b, _ in cluster for s in (a, b)}, key=lambda s: sessions[s]["date"])
+        if pending is not None and not pending.intersection(members):
+            continue
+        clusters.append({
+            "max_similarity": round(max(score for _, _, score in cluster), 2),
+            "sessions": [
+                {"id": s, "date": sessions[s]["date"], "first_message": sessions[s]["first_message"]}
+                for s in members
+            ],
+            "pairs": [{"a": a, "b": b, "similarity": round(score, 2)}
+                      for a, b, score in sorted(cluster, key=lambda p: -p[2])],
+        })
+
+    clusters.sort(key=lambda c: -c["max_similarity"])
+    return {"project": project_path.name, "indexed_sessions": len(sessions),
+            "newly_indexed": index.get("backfilled", 0), "threshold": threshold, "clusters": clusters}
+
+
+def find_duplicate_facts(project_path: Path, threshold: float = 0.6) -> dict:
+    """Near-duplicate bullet points across small.md and medium.md."""
+    facts = []
+    for name in ("small.md", "medium.md"):
+        path = project_path / "goldfish" / name
+        if not path.exists():
+            continue
+        for line_no, line in enumerate(path.read_text().split("\n"), 1):
+            stripped = line.strip()
+            if stripped.startswith(("- ", "* ")) and len(stripped) > 20:
+                facts.append({"file": name, "line": line_no, "text": stripped[2:]})
+
+    index = {"sessions": {}, "buckets": {}}
+    for i, fact in enumerate(facts):
+        signature = minhash(shingles(fact["text"]))
+        index["sessions"][str(i)] = {"signature": signature}
+        for key in band_keys(signature):
+            index["buckets"].setdefault(key, []).append(str(i))
+
+    duplicates = []
+    for a, b, score in sorted(candidate_pairs(index, threshold), key=lambda p: -p[2]):
+        duplicates.append({"similarity": round(score, 2), "facts": [facts[int(a)], facts[int(b)]]})
+    return {"project": project_path.name, "facts_checked": len(facts), "duplicates": duplicates}
+
+
+def option(args: list, name: str, default):
+    """Value following --name in args, converted to default's type."""
+    if name in args:
+        return type(default)(args[args.index(name) + 1])
+    return default
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    command = args[0]
+    project_path = Path(args[1]).expanduser()
+
+    if command == "candidates":
+        result = find_candidates(project_path, option(args, "--threshold", 0.5), "--new" in args)
+        print(json.dumps(result, indent=2))
+    elif command == "facts":
+        print(json.dumps(find_duplicate_facts(project_path, option(args, "--threshold", 0.6)), indent=2))
+    elif command == "rebuild":
+        print(f"Indexed {rebuild(project_path)} sessions")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
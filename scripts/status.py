@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Goldfish Status Snapshot
+
+Keeps ~/.goldfish/state/status.json up to date so `goldfish status` can
+answer from one small file instead of walking the synced memory tree:
+
+  - projects per vault, with pending inbox sessions and memory-file sizes
+  - the last auto-save run: when, how long, whether it succeeded
+  - recent pipeline errors
+
+Project entries are refreshed whenever a project's context bundle is rebuilt
+(appender, compaction, /gfsave). auto-save.sh records each run and rescans
+the whole memory folder at most once an hour, to pick up projects created or
+deleted by hand.
+
+Usage:
+  status.py [--json]                     Show status (`goldfish status`)
+  status.py --verify                     Rescan the memory folder and report drift
+  status.py record-run <start> [--failed <stage>]   Record an auto-save run
+  status.py record-error <stage>         Record a non-fatal pipeline error
+  status.py rescan                       Rebuild the snapshot from a full scan
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+GOLDFISH_PATH = Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish"
+STATUS_PATH = Path.home() / ".goldfish" / "state" / "status.json"
+LOG_PATH = Path.home() / ".goldfish" / "logs" / "goldfish.log"
+STATUS_VERSION = 1
+
+MAX_ERRORS = 10
+RESCAN_INTERVAL_SECONDS = 3600
+CHARS_PER_TOKEN = 4
+MEMORY_FILES = ("small", "medium", "large", "archive")
+
+# Project to vault mapping
+WORK_PROJECTS = {"velona", "element-ai", "fred", "fred-research", "verra-ai"}
+
+
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+
+def empty_snapshot() -> dict:
+    return {"version": STATUS_VERSION, "projects": {}, "last_run": None,
+            "last_success": None, "errors": [], "last_rescan": 0}
+
+
+def load_snapshot() -> dict:
+    """Load the status snapshot (empty if missing or from an older version)."""
+    if STATUS_PATH.exists():
+        try:
+            with open(STATUS_PATH) as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") == STATUS_VERSION:
+                return snapshot
+        except (json.JSONDecodeError, OSError):
+            pass
+    return empty_snapshot()
+
+
+def save_snapshot(snapshot: dict):
+    """Write the snapshot atomically."""
+    snapshot["updated"] = time.time()
+    STATUS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATUS_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, STATUS_PATH)
+
+
+def project_from_path(filepath: str) -> tuple:
+    """Extract project name and vault from session filepath."""
+    path = Path(filepath)
+
+    # Look for project indicators in the path
+    parts = path.parts
+
+    # Check for Goldfish directory structure
+    if "Goldfish" in parts:
+        idx = parts.index("Goldfish")
+        if len(parts) > idx + 2:
+            vault = parts[idx + 1]  # work or personal
+            project = parts[idx + 2]
+            return (project, vault)
+
+    # Check for project name in path
+    for part in reversed(parts):
+        part_lower = part.lower()
+        # Skip common non-project directories
+        if part_lower in {'.claude', 'projects', 'users', 'rayhernandez', 'library'}:
+            continue
+        # Check if it looks like a project
+        if '-' in part or part_lower.isalpha():
+            vault = "work" if part_lower in WORK_PROJECTS else "personal"
+            return (part_lower, vault)
+
+    return (None, None)
+
+
+def resolve_project_path(project: str, vault: str, filepath: str = ""):
+    """Memory folder a session classified as vault/project is filed under.
+
+    Unclassified sessions fall back to their file path. If the project only
+    exists in the other vault, that one is used. The returned folder may not
+    exist yet; None if no project can be determined.
+    """
+    if not project or project == "UNCLEAR":
+        project, vault = project_from_path(filepath)
+    if not project or project == "UNCLEAR":
+        return None
+
+    if not vault or vault not in ("work", "personal"):
+        vault = "work" if project.lower() in WORK_PROJECTS else "personal"
+
+    project_path = GOLDFISH_PATH / vault / project.lower()
+    if not project_path.exists():
+        alt_path = GOLDFISH_PATH / ("personal" if vault == "work" else "work") / project.lower()
+        if alt_path.exists():
+            return alt_path
+    return project_path
+
+
+def project_key(project_path: Path) -> str:
+    """'vault/project' (nested projects keep their subpath, e.g. personal/no-category/x)."""
+    try:
+        return project_path.resolve().relative_to(GOLDFISH_PATH.resolve()).as_posix()
+    except ValueError:
+        return f"{project_path.parent.name}/{project_path.name}"
+
+
+def project_entry(project_path: Path) -> dict:
+    """Pending count and memory-file sizes for one project (every machine's shards)."""
+    from machine import shard_paths
+    from inbox import pending_sessions
+
+    goldfish_dir = project_path / "goldfish"
+
+    def size(name: str) -> int:
+        return sum(p.stat().st_size for p in shard_paths(goldfish_dir / name))
+
+    return {
+        "pending": len(pending_sessions(project_path)),
+        "bytes": {
+            "small": size("small.md"),
+            "medium": size("medium.md"),
+            "large": size("large.md"),
+            "archive": size("large-archive.bin"),
+        },
+    }
+
+
+def scan_projects() -> dict:
+    """Entries for every project in the memory folder (the slow, full walk)."""
+    from archive import iter_projects
+    return {project_key(p): project_entry(p) for p in iter_projects()}
+
+
+def update_projects(project_paths):
+    """Refresh the snapshot entries of projects that just changed."""
+    project_paths = list(project_paths)
+    if not project_paths:
+        return
+    snapshot = load_snapshot()
+    for project_path in project_paths:
+        if (project_path / "goldfish").is_dir():
+            snapshot["projects"][project_key(project_path)] = project_entry(project_path)
+    save_snapshot(snapshot)
+
+
+def add_error(snapshot: dict, stage: str):
+    """Record a failed stage with the last meaningful line of the log."""
+    message = ""
+    if LOG_PATH.exists():
+        with open(LOG_PATH, 'rb') as f:
+            f.seek(max(0, os.path.getsize(LOG_PATH) - 8192))
+            tail = f.read().decode("utf-8", "replace").strip().split("\n")
+        for line in reversed(tail):
+            line = line.strip()
+            if line and "ERROR:" not in line and "WARNING:" not in line:
+                message = line[:300]
+                break
+    snapshot["errors"].append({"time": time.time(), "stage": stage, "message": message})
+    snapshot["errors"] = snapshot["errors"][-MAX_ERRORS:]
+
+
+def record_run(started: float, failed_stage: str = None):
+    """Record an auto-save run; rescans the memory folder if the last rescan is old."""
+    snapshot = load_snapshot()
+    finished = time.time()
+    run = {"started": started, "duration": round(finished - started, 2), "ok": failed_stage is None}
+    snapshot["last_run"] = run
+    if failed_stage:
+        run["failed_stage"] = failed_stage
+        add_error(snapshot, failed_stage)
+    else:
+        snapshot["last_success"] = run
+
+    if finished - snapshot.get("last_rescan", 0) > RESCAN_INTERVAL_SECONDS:
+        snapshot["projects"] = scan_projects()
+        snapshot["last_rescan"] = finished
+    save_snapshot(snapshot)
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def ago(timestamp) -> str:
+    """'3m ago' style age of a Unix timestamp."""
+    if not timestamp:
+        return "never"
+    seconds = max(0, int(time.time() - timestamp))
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit} ago"
+    return f"{seconds}s ago"
+
+
+def tokens(size: int) -> str:
+    """Byte size as a token estimate: ~850, ~6.2k, ~52k."""
+    count = size // CHARS_PER_TOKEN
+    if count >= 10000:
+        return f"~{count // 1000}k"
+    if count >= 1000:
+        return f"~{count / 1000:.1f}k"
+    return f"~{count}"
+
+
+def render(snapshot: dict) -> str:
+    """Human-readable status report."""
+    lines = ["🐠 GOLDFISH STATUS", ""]
+
+    run = snapshot.get("last_run")
+    if run:
+        result = "✓ ok" if run["ok"] else f"✗ failed in {run.get('failed_stage', '?')}"
+        lines.append(f"Last auto-save: {ago(run['started'])} ({run['duration']:.1f}s) {result}")
+        if not run["ok"]:
+            lines.append(f"Last success:   {ago((snapshot.get('last_success') or {}).get('started'))}")
+    else:
+        lines.append("Last auto-save: never recorded")
+    lines.append("")
+
+    by_vault = {}
+    for key, entry in snapshot["projects"].items():
+        vault, _, project = key.partition("/")
+        by_vault.setdefault(vault, []).append((project, entry))
+
+    total_pending = sum(e["pending"] for e in snapshot["projects"].values())
+    lines.append(f"Vaults: {len(by_vault)} | Projects: {len(snapshot['projects'])} | Pending sessions: {total_pending}")
+    for vault, projects in sorted(by_vault.items()):
+        pending = sum(e["pending"] for _, e in projects)
+        lines.append("")
+        lines.append(f"  {vault} ({len(projects)} projects, {pending} pending)")
+        width = max(len(p) for p, _ in projects)
+        for project, entry in sorted(projects):
+            sizes = "  ".join(f"{name} {tokens(entry['bytes'][name])}" for name in MEMORY_FILES
+                              if entry["bytes"][name] or name != "archive")
+            flag = f"  ⚠ {entry['pending']} pending" if entry["pending"] else ""
+            lines.append(f"    {project:<{width}}  {sizes}{flag}")
+
+    errors = snapshot.get("errors") or []
+    if errors:
+        lines.append("")
+        lines.append("Recent errors:")
+        for error in errors[-5:]:
+            lines.append(f"  {ago(error['time'])}  {error['stage']}: {error['message']}")
+
+    lines.append("")
+    lines.append(f"Snapshot updated {ago(snapshot.get('updated'))}, full scan {ago(snapshot.get('last_rescan'))}")
+    return "\n".join(lines)
+
+
+def verify(snapshot: dict) -> list:
+    """Differences between the snapshot and a full scan of the memory folder."""
+    scanned = scan_projects()
+    drift = []
+    for key in sorted(set(scanned) | set(snapshot["projects"])):
+        recorded = snapshot["projects"].get(key)
+        actual = scanned.get(key)
+        if recorded is None:
+            drift.append(f"  + {key}: not in snapshot")
+        elif actual is None:
+            drift.append(f"  - {key}: in snapshot but no longer on disk")
+        elif recorded != actual:
+            changes = []
+            if recorded["pending"] != actual["pending"]:
+                changes.append(f"pending {recorded['pending']} -> {actual['pending']}")
+            for name in MEMORY_FILES:
+                if recorded["bytes"].get(name) != actual["bytes"][name]:
+                    changes.append(f"{name} {recorded['bytes'].get(name)} -> {actual['bytes'][name]} bytes")
+            drift.append(f"  ~ {key}: {', '.join(changes)}")
+
+    snapshot["projects"] = scanned
+    snapshot["last_rescan"] = time.time()
+    save_snapshot(snapshot)
+    return drift
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if args and args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    command = args[0] if args and not args[0].startswith("--") else "show"
+
+    if command == "show":
+        snapshot = load_snapshot()
+        if "--verify" in args:
+            drift = verify(snapshot)
+            print(render(snapshot))
+            print()
+            if drift:
+                print(f"Verify: snapshot was out of date ({len(drift)} projects, now corrected)")
+                print("\n".join(drift))
+            else:
+                print("Verify: snapshot matches a full scan ✓")
+        elif "--json" in args:
+            print(json.dumps(snapshot, indent=1))
+        else:
+            print(render(snapshot))
+    elif command == "record-run" and len(args) >= 2:
+        failed = args[args.index("--failed") + 1] if "--failed" in args else None
+        record_run(float(args[1]), failed)
+    elif command == "record-error" and len(args) >= 2:
+        snapshot = load_snapshot()
+        add_error(snapshot, args[1])
+        save_snapshot(snapshot)
+    elif command == "rescan":
+        snapshot = load_snapshot()
+        snapshot["projects"] = scan_projects()
+        snapshot["last_rescan"] = time.time()
+        save_snapshot(snapshot)
+        print(f"Scanned {len(snapshot['projects'])} projects")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Goldfish Topic Engine
+
+Corpus-level TF-IDF topics for sessions and projects, replacing the fixed
+keyword table reader.py used to have.
+
+Every session becomes a sparse term vector built from its first message
+(words and word pairs), file paths (path components and languages) and tool
+inputs (commands, search patterns). Term counts and document frequencies are
+kept in ~/.goldfish/state/topics-corpus.json and updated incrementally: only
+new or changed sessions are re-tokenized, then every vector is re-weighted
+against the current document frequencies in one pass.
+
+Per-project topics are written to <memory>/.goldfish/topics.<machine>.json,
+which the context bundle manifest and /gfstatus read (merged over machines).
+
+Usage:
+  topics.py show [vault/project]     Print project topics
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from machine import own_shard, load_json_shards
+from status import project_key, resolve_project_path
+
+CORPUS_PATH = Path.home() / ".goldfish" / "state" / "topics-corpus.json"
+PROJECT_TOPICS_PATH = Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish" / ".goldfish" / "topics.json"
+CORPUS_VERSION = 1
+
+SESSION_TOPICS = 6
+PROJECT_TOPICS = 10
+RECENT_SESSIONS = 5
+MAX_DF_RATIO = 0.5          # terms in more than half of all sessions say nothing
+MIN_DF = 2                  # one-off terms (typos, random word pairs) aren't topics...
+MIN_DF_CORPUS = 50          # ...once the corpus is big enough for repeats to show up
+
+MESSAGE_WEIGHT = 2
+PATH_WEIGHT = 1
+TOOL_WEIGHT = 1
+
+WORD_RE = re.compile(r"[a-z][a-z0-9+#]*(?:[.-][a-z0-9]+)*")
+PATH_SPLIT_RE = re.compile(r"[/\\\\_.\-\s]+")
+
+STOP_WORDS = {
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with",
+    "by", "from", "as", "is", "was", "are", "were", "been", "be", "have", "has", "had",
+    "do", "does", "did", "will", "would", "could", "should", "may", "might", "must",
+    "shall", "can", "need", "about", "all", "also", "any", "because", "before",
+    "between", "both", "each", "few", "first", "how", "into", "it", "its", "just",
+    "last", "like", "make", "many", "more", "most", "new", "no", "not", "now", "only",
+    "other", "our", "out", "over", "own", "same", "so", "some", "still", "such", "than",
+    "that", "their", "them", "then", "there", "these", "they", "this", "those",
+    "through", "too", "under", "up", "very", "what", "when", "where", "which", "while",
+    "who", "why", "you", "your", "i", "me", "my", "we", "us", "please", "let", "lets",
+    "let's", "want", "get", "got", "use", "using", "used", "go", "going", "look", "see",
+    "here", "thing", "things", "something", "way", "yes", "ok", "okay", "thanks", "hi",
+    "hey", "one", "two", "able", "sure", "right", "know", "think", "try", "work",
+    "working", "file", "files", "help", "can't", "don't", "it's", "i'm", "i'd",
+    "command", "message", "name", "args",
+}
+
+# File extensions that say something about the session's subject
+EXTENSION_TOPICS = {
+    "py": "python", "ts": "typescript", "tsx": "typescript", "js": "javascript",
+    "jsx": "javascript", "rs": "rust", "go": "go", "rb": "ruby", "java": "java",
+    "kt": "kotlin", "swift": "swift", "sql": "sql", "css": "css", "scss": "css",
+    "html": "html", "md": "docs", "sh": "shell", "yml": "yaml", "yaml": "yaml",
+    "tf": "terraform", "ipynb": "jupyter", "vue": "vue", "svelte": "svelte",
+}
+
+# Commands whose first word is a useful topic (git, npm, docker ...). Shell
+# plumbing like cd/ls/cat is ignored.
+SHELL_NOISE = {
+    "cd", "ls", "cat", "echo", "grep", "rg", "find", "head", "tail", "mkdir", "rm",
+    "cp", "mv", "pwd", "chmod", "touch", "sed", "awk", "wc", "sort", "xargs", "which",
+    "sudo", "env", "export", "source", "true", "false", "test", "sleep", "open",
+}
+
+
+# ---------------------------------------------------------------------------
+# Tokenizing
+# ---------------------------------------------------------------------------
+
+def message_terms(text: str) -> list:
+    """Words and adjacent word pairs (as 'a-b') from a message."""
+    text = re.sub(r"<[^>]+>", " ", (text or "").lower())
+    words = [w for w in WORD_RE.findall(text) if w not in STOP_WORDS and len(w) > 2]
+    pairs = [f"{a}-{b}" for a, b in zip(words, words[1:])]
+    return words + pairs
+
+
+def path_terms(path: str, excluded: set) -> list:
+    """Meaningful path components plus a language term from the extension."""
+    terms = []
+    name = path.rsplit("/", 1)[-1]
+    if "." in name:
+        ext = name.rsplit(".", 1)[-1].lower()
+        if ext in EXTENSION_TOPICS:
+            terms.append(EXTENSION_TOPICS[ext])
+    for part in PATH_SPLIT_RE.split(path.lower()):
+        if (len(part) > 2 and part not in excluded and part not in STOP_WORDS
+                and part not in EXTENSION_TOPICS and not part[0].isdigit()
+                and not re.match(r"^[0-9a-f]{8,}$", part)):
+            terms.append(part)
+    return terms
+
+
+def tool_terms(tool_input: str) -> list:
+    """Program name of shell commands, words of search patterns/queries."""
+    words = WORD_RE.findall(tool_input.lower())
+    if not words:
+        return []
+    if words[0] in SHELL_NOISE:
+        return []
+    return [w for w in words[:3] if w not in STOP_WORDS and w not in SHELL_NOISE and len(w) > 2]
+
+
+def session_term_counts(info: dict, excluded: set) -> dict:
+    """Weighted term counts for one session."""
+    counts = Counter()
+    for term in message_terms(info.get("first_user_message") or ""):
+        counts[term] += MESSAGE_WEIGHT
+    for fp in info.get("files_touched", []):
+        for term in path_terms(fp, excluded):
+            counts[term] += PATH_WEIGHT
+    for tool_input in info.get("tool_inputs", []):
+        for term in tool_terms(tool_input):
+            counts[term] += TOOL_WEIGHT
+    return dict(counts)
+
+
+def session_fingerprint(info: dict) -> str:
+    """Changes whenever the fields topics are built from change."""
+    data = json.dumps([info.get("first_user_message") or "", info.get("files_touched", []),
+                       info.get("tool_inputs", [])], sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def load_corpus() -> dict:
+    """Load the machine-local term-count corpus."""
+    if CORPUS_PATH.exists():
+        try:
+            with open(CORPUS_PATH) as f:
+                corpus = json.load(f)
+            if corpus.get("version") == CORPUS_VERSION:
+                return corpus
+        except (json.JSONDecodeError, OSError):
+            pass
+    return {"version": CORPUS_VERSION, "docs": {}, "df": {}}
+
+
+def save_corpus(corpus: dict):
+    """Write the corpus atomically."""
+    CORPUS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = CORPUS_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(json.dumps(corpus, separators=(",", ":")))  # dumps() uses the C encoder
+    os.replace(tmp_path, CORPUS_PATH)
+
+
+def _remove_doc(corpus: dict, session_id: str):
+    doc = corpus["docs"].pop(session_id, None)
+    if not doc:
+        return
+    df = corpus["df"]
+    for term in doc["terms"]:
+        df[term] -= 1
+        if df[term] <= 0:
+            del df[term]
+
+
+def _add_doc(corpus: dict, session_id: str, doc: dict):
+    corpus["docs"][session_id] = doc
+    df = corpus["df"]
+    for term in doc["terms"]:
+        df[term] = df.get(term, 0) + 1
+
+
+def session_project_key(info: dict, classification: dict) -> str:
+    """Key of the project folder the appender files this session under (status.project_key)."""
+    project_path = resolve_project_path(classification.get("project"), classification.get("vault"),
+                                        info.get("filepath", ""))
+    return project_key(project_path) if project_path else "unclear"
+
+
+def update_corpus(corpus: dict, session_infos: list, classifications: dict, excluded: set) -> int:
+    """Add new/changed sessions and drop ones that no longer exist. Returns docs re-tokenized."""
+    current = {info["session_id"] for info in session_infos}
+    for session_id in list(corpus["docs"]):
+        if session_id not in current:
+            _remove_doc(corpus, session_id)
+
+    changed = 0
+    for info in session_infos:
+        session_id = info["session_id"]
+        project = session_project_key(info, classifications.get(session_id, {}))
+        fingerprint = session_fingerprint(info)
+        doc = corpus["docs"].get(session_id)
+
+        if doc and doc["fp"] == fingerprint:
+            doc["project"] = project          # classification may change without content changing
+            doc["date"] = info.get("date") or ""
+            continue
+
+        _remove_doc(corpus, session_id)
+        _add_doc(corpus, session_id, {
+            "fp": fingerprint,
+            "project": project,
+            "date": info.get("date") or "",
+            "terms": session_term_counts(info, excluded),
+        })
+        changed += 1
+    return changed
+
+
+# ---------------------------------------------------------------------------
+# TF-IDF scoring
+# ---------------------------------------------------------------------------
+
+def idf_table(corpus: dict) -> dict:
+    """Smoothed IDF per term; terms outside [MIN_DF, MAX_DF_RATIO] get 0."""
+    total = len(corpus["docs"])
+    max_df = max(2, total * MAX_DF_RATIO)
+    min_df = MIN_DF if total >= MIN_DF_CORPUS else 1
+    return {
+        term: (math.log((1 + total) / (1 + df)) + 1.0) if min_df <= df <= max_df else 0.0
+        for term, df in corpus["df"].items()
+    }
+
+
+def doc_vector(terms: dict, idf: dict) -> dict:
+    """L2-normalised sublinear TF-IDF vector of one document."""
+    vector = {}
+    for term, count in terms.items():
+        weight = (1.0 + math.log(count)) * idf.get(term, 0.0)
+        if weight > 0:
+            vector[term] = weight
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    if norm:
+        for term in vector:
+            vector[term] /= norm
+    return vector
+
+
+def top_terms(vector: dict, k: int) -> list:
+    """Top-k terms, dropping single words already covered by a chosen pair."""
+    chosen = []
+    for term, _ in sorted(vector.items(), key=lambda kv: (-kv[1], kv[0])):
+        if any(term in c.split("-") for c in chosen if "-" in c):
+            continue
+        chosen.append(term)
+        if len(chosen) == k:
+            break
+    return chosen
+
+
+def assign_topics(corpus: dict) -> tuple:
+    """Compute (session_topics, project_topics) for the whole corpus in one pass."""
+    idf = idf_table(corpus)
+    session_topics = {}
+    project_sum = defaultdict(Counter)
+    project_docs = defaultdict(list)
+
+    for session_id, doc in corpus["docs"].items():
+        vector = doc_vector(doc["terms"], idf)
+        session_topics[session_id] = top_terms(vector, SESSION_TOPICS)
+        project_sum[doc["project"]].update(vector)
+        project_docs[doc["project"]].append((doc["date"], vector))
+
+    project_topics = {}
+    for project, total in project_sum.items():
+        docs = sorted(project_docs[project], key=lambda d: d[0], reverse=True)
+        recent = Counter()
+        for _, vector in docs[:RECENT_SESSIONS]:
+            recent.update(vector)
+        project_topics[project] = {
+            "all": top_terms(total, PROJECT_TOPICS),
+            "recent": top_terms(recent, SESSION_TOPICS),
+            "sessions": len(docs),
+            "last": docs[0][0],
+        }
+
+    return (session_topics, project_topics)
+
+
+def save_project_topics(project_topics: dict):
+    """Write this machine's per-project topics next to the other shared Goldfish state."""
+    path = own_shard(PROJECT_TOPICS_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(project_topics, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_project_topics() -> dict:
+    """Per-project topics from every machine's last reader run.
+
+    When several machines work on a project, "all" comes from the machine
+    with the most sessions and "recent" from the one that worked on it last.
+    """
+    merged = {}
+    for _, machine_topics in load_json_shards(PROJECT_TOPICS_PATH):
+        for project, data in machine_topics.items():
+            current = merged.get(project)
+            if current is None:
+                merged[project] = {**data, "most": data["sessions"]}
+                continue
+            sessions = current["sessions"] + data["sessions"]
+            if data.get("last", "") > current.get("last", ""):
+                current["recent"], current["last"] = data["recent"], data.get("last", "")
+            if data["sessions"] > current["most"]:
+                current["all"], current["most"] = data["all"], data["sessions"]
+            current["sessions"] = sessions
+    for data in merged.values():
+        data.pop("most", None)
+    return merged
+
+
+def process_sessions(session_infos: list, classifications: dict, excluded: set = frozenset()) -> dict:
+    """Update the corpus, set info["topics"] on every session, save project topics.
+
+    Returns stats about the run.
+    """
+    corpus = load_corpus()
+    changed = update_corpus(corpus, session_infos, classifications, {e.lower() for e in excluded})
+    session_topics, project_topics = assign_topics(corpus)
+
+    for info in session_infos:
+        info["topics"] = session_topics.get(info["session_id"], [])
+
+    save_corpus(corpus)
+    save_project_topics(project_topics)
+    return {"sessions": len(corpus["docs"]), "retokenized": changed,
+            "terms": len(corpus["df"]), "projects": len(project_topics)}
+
+
+def main():
+    """Command-line entry point."""
+    args = sys.argv[1:]
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__)
+        return
+
+    if args[0] == "show":
+        project_topics = load_project_topics()
+        wanted = args[1].lower() if len(args) > 1 else None
+        for project, data in sorted(project_topics.items()):
+            if wanted and project.lower() != wanted:
+                continue
+            print(f"  {project} ({data['sessions']} sessions)")
+            print(f"    recent: {', '.join(data['recent'])}")
+            print(f"    all:    {', '.join(data['all'])}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,64 +9,53 @@ It ONLY:
 3. Flags inbox.md with "new session needs processing"
 
 NO quality summaries. That's Claude's job when /gfsave runs.
+
+Everything it writes goes to this machine's shards (large.<machine>.md,
+inbox.<machine>.md, processed-sessions.<machine>.json - see machine.py), so
+machines sharing a synced memory folder never rewrite each other's files.
 """
 
 import json
 from pathlib import Path
 from datetime import datetime
 
+from history import entry_session_prefix
+import archive
+import renderer
+from blobstore import BlobStore, move_references
+import similarity
+import bundle
+import inbox
+import status
+from machine import own_shard, load_set_union
+
 GOLDFISH_PATH = Path.home() / "Library" / "CloudStorage" / "Dropbox-Personal" / "Goldfish"
 SESSION_ANALYSIS_PATH = GOLDFISH_PATH / ".goldfish" / "session-analysis.json"
 PROCESSED_SESSIONS_PATH = GOLDFISH_PATH / ".goldfish" / "processed-sessions.json"
+SESSION_MOVES_PATH = GOLDFISH_PATH / ".goldfish" / "session-moves.json"
 
-# Project to vault mapping
-WORK_PROJECTS = {"velona", "element-ai", "fred", "fred-research", "verra-ai"}
+# Runs a queued move is retried for when its session can't be found yet
+MAX_MOVE_ATTEMPTS = 12
 
+RENDER_SETTINGS = renderer.load_settings()
 
 def load_processed_sessions() -> set:
-    """Load list of already-processed session IDs."""
-    if PROCESSED_SESSIONS_PATH.exists():
-        with open(PROCESSED_SESSIONS_PATH) as f:
-            return set(json.load(f))
-    return set()
-
-
-def save_processed_sessions(processed: set):
-    """Save list of processed session IDs."""
-    with open(PROCESSED_SESSIONS_PATH, 'w') as f:
-        json.dump(list(processed), f, indent=2)
-
-
-def get_project_from_path(filepath: str) -> tuple:
-    """Extract project name and vault from session filepath."""
-    path = Path(filepath)
-
-    # Look for project indicators in the path
-    parts = path.parts
-
-    # Check for Goldfish directory structure
-    if "Goldfish" in parts:
-        idx = parts.index("Goldfish")
-        if len(parts) > idx + 2:
-            vault = parts[idx + 1]  # work or personal
-            project = parts[idx + 2]
-            return (project, vault)
-
-    # Check for project name in path
-    for part in reversed(parts):
-        part_lower = part.lower()
-        # Skip common non-project directories
-        if part_lower in {'.claude', 'projects', 'users', 'rayhernandez', 'library'}:
-            continue
-        # Check if it looks like a project
-        if '-' in part or part_lower.isalpha():
-            vault = "work" if part_lower in WORK_PROJECTS else "personal"
-            return (part_lower, vault)
+    """Load already-processed session IDs from every machine."""
+    return load_set_union(PROCESSED_SESSIONS_PATH)
 
-    return (None, None)
 
+def save_processed_sessions(appended: set):
+    """Add session IDs appended in this run to this machine's processed list."""
+    path = own_shard(PROCESSED_SESSIONS_PATH)
+    processed = set()
+    if path.exists():
+        with open(path) as f:
+            processed = set(json.load(f))
+    with open(path, 'w') as f:
+        json.dump(sorted(processed | appended), f, indent=2)
 
-def format_transcript(session: dict) -> str:
+
+def format_transcript(session: dict, blob_store: BlobStore = None) -> str:
     """Format a session as a readable transcript."""
     lines = []
 
@@ -106,70 +95,167 @@ def format_transcript(session: dict) -> str:
         lines.append(f"**Tools:** {', '.join(tools[:10])}")
         lines.append("")
 
+    # Subagents (their files and tools are already merged into the lists above)
+    agents = session.get("agents", [])
+    if agents:
+        lines.append(f"**Subagents:** {len(agents)}")
+        for agent in agents[:10]:
+            task = agent.get("task", "").replace("\n", " ").strip()[:120]
+            lines.append(f"- {task or agent.get('agent_id', '?')} ({agent.get('files', 0)} files)")
+        if len(agents) > 10:
+            lines.append(f"- ... and {len(agents) - 10} more")
+        lines.append("")
+
+    # Full conversation (opt-in via "transcripts.full" in config.json)
+    filepath = session.get("filepath")
+    if RENDER_SETTINGS.get("full") and filepath and Path(filepath).exists():
+        try:
+            transcript, _ = renderer.render_session_file(
+                filepath, blob_store=blob_store, session_id=session.get("session_id", ""))
+        except OSError:
+            transcript = ""
+        if transcript:
+            lines.append("**Transcript:**")
+            lines.append("")
+            lines.append(transcript)
+            lines.append("")
+
     lines.append(f"*Raw transcript in ~/.claude session files*")
 
     return "\n".join(lines)
 
 
 def update_inbox(project_path: Path, session: dict):
-    """Add new session flag to inbox.md."""
-    inbox_path = project_path / "goldfish" / "inbox.md"
+    """Flag a new session in this machine's inbox shard."""
+    inbox.add_session(project_path, session)
 
-    session_id = session.get("session_id", "unknown")[:8]
-    date = session.get("date", datetime.now().strftime("%Y-%m-%d %H:%M"))
-    first_msg = session.get("first_user_message", "")[:200]
 
-    new_entry = f"""
----
-## NEW SESSION: {session_id}...
-**Date:** {date}
-**Status:** NEEDS_PROCESSING
+def append_to_large_md(project_path: Path, session: dict) -> str:
+    """Append session transcript to large.md. Returns the appended entry."""
+    entry = format_transcript(session, get_blob_store(project_path))
+    append_entry_to_large_md(project_path, entry)
+    return entry
 
-**Preview:**
-> {first_msg}...
 
-*Run /gfsave to generate quality summaries*
----
-"""
+def append_entry_to_large_md(project_path: Path, entry: str):
+    """Append an already-formatted session entry to this machine's large.md."""
+    large_path = own_shard(project_path / "goldfish" / "large.md")
+    large_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Read existing or create new
-    if inbox_path.exists():
-        content = inbox_path.read_text()
-    else:
-        content = f"# {project_path.name} - Inbox\n\nNew sessions waiting for quality summaries.\n"
+    # Segments are append-only, so the sync client only uploads the new tail
+    with open(large_path, 'a') as f:
+        if f.tell() == 0:
+            f.write(f"# {project_path.name} - Complete History ({large_path.name})\n\n"
+                    f"*Full session transcripts appended automatically*\n")
+        f.write(entry)
 
-    # Append new entry at the top (after header)
-    lines = content.split("\n")
-    header_end = 0
-    for i, line in enumerate(lines):
-        if line.startswith("---") or line.startswith("## NEW SESSION"):
-            header_end = i
-            break
-        header_end = i + 1
 
-    new_content = "\n".join(lines[:header_end]) + new_entry + "\n".join(lines[header_end:])
+# One blob store per vault, shared by every session appended in this run
+BLOB_STORES = {}
 
-    inbox_path.parent.mkdir(parents=True, exist_ok=True)
-    inbox_path.write_text(new_content)
 
+def get_blob_store(project_path: Path) -> BlobStore:
+    """Return the blob store of the vault containing project_path."""
+    vault_path = GOLDFISH_PATH / project_path.relative_to(GOLDFISH_PATH).parts[0]
+    if vault_path not in BLOB_STORES:
+        BLOB_STORES[vault_path] = BlobStore(vault_path)
+    return BLOB_STORES[vault_path]
 
-def append_to_large_md(project_path: Path, session: dict):
-    """Append session transcript to large.md."""
-    large_path = project_path / "goldfish" / "large.md"
 
-    transcript = format_transcript(session)
+def save_blob_stores():
+    """Persist reference changes for every blob store touched in this run."""
+    for store in BLOB_STORES.values():
+        store.save()
 
-    # Read existing or create new
-    if large_path.exists():
-        content = large_path.read_text()
-    else:
-        content = f"# {project_path.name} - Complete History\n\n*Full session transcripts appended automatically*\n"
 
-    # Append transcript
-    content += transcript
+# Projects whose memory files changed this run (their context bundles get refreshed)
+TOUCHED_PROJECTS = set()
+
+
+def refresh_bundles():
+    """Rebuild context.md for every project touched in this run."""
+    for project_path in TOUCHED_PROJECTS:
+        bundle.refresh(project_path)
+    TOUCHED_PROJECTS.clear()
 
-    large_path.parent.mkdir(parents=True, exist_ok=True)
-    large_path.write_text(content)
+
+def find_project_path(project: str, vault: str):
+    """Return the existing project directory for project/vault, checking both vaults."""
+    project_path = status.resolve_project_path(project, vault)
+    return project_path if project_path and project_path.exists() else None
+
+
+def relocate_moved_sessions(processed: set) -> int:
+    """Move large.md entries of re-classified sessions to their new project.
+
+    reader.py queues sessions whose project changed in this machine's
+    session-moves.json. Sessions that were never appended don't need moving:
+    they'll be written to the right place when they're processed.
+    """
+    moves_path = own_shard(SESSION_MOVES_PATH)
+    moves = []
+    for path in (SESSION_MOVES_PATH, moves_path):
+        if path.exists():
+            with open(path) as f:
+                moves.extend(json.load(f))
+    if not moves:
+        return 0
+
+    relocated = 0
+    still_pending = []
+    for move in moves:
+        session_id = move.get("session_id", "")
+        if session_id not in processed:
+            continue
+
+        source = find_project_path(move["from"].get("project"), move["from"].get("vault"))
+        target = find_project_path(move["to"].get("project"), move["to"].get("vault"))
+        if target is None:
+            # Target project doesn't exist yet - retry on a later run
+            still_pending.append(move)
+            continue
+        if source is None or source == target:
+            continue
+
+        # The entry may be in any segment of either tier (the plain large.md is
+        # shared, machine segments are append-only, archives are immutable), so
+        # it's hidden with a move record rather than cut out of the file
+        entry = archive.read_session(source, session_id)
+        if entry is None:
+            # Possibly a segment that hasn't synced yet - retry, but not forever
+            move["attempts"] = move.get("attempts", 0) + 1
+            if move["attempts"] < MAX_MOVE_ATTEMPTS:
+                still_pending.append(move)
+            else:
+                print(f"  WARNING: {session_id[:8]}... not found in {source.parent.name}/{source.name}, move dropped")
+            continue
+        prefix = entry_session_prefix(entry)
+
+        move_references(entry, session_id, get_blob_store(source), get_blob_store(target))
+        similarity.move_session(session_id, source, target, entry)
+        # Moving back to a project that still holds the hidden copy just un-hides it
+        if prefix in archive.moved_out(target):
+            if not archive.holds_session(target, prefix):
+                append_entry_to_large_md(target, entry)
+            archive.record_move(target, prefix, "in", f"{source.parent.name}/{source.name}")
+        else:
+            append_entry_to_large_md(target, entry)
+        archive.record_move(source, prefix, "out", f"{target.parent.name}/{target.name}")
+        # Still waiting for /gfsave: the summary belongs to the new project now
+        inbox.move_flag(source, target, prefix, similarity.entry_first_message(entry).removesuffix("..."))
+        relocated += 1
+        TOUCHED_PROJECTS.update((source, target))
+        print(f"  MOVE: {session_id[:8]}... {source.parent.name}/{source.name} -> {target.parent.name}/{target.name}")
+
+    if still_pending:
+        with open(moves_path, 'w') as f:
+            json.dump(still_pending, f, indent=2)
+    elif moves_path.exists():
+        moves_path.unlink()
+    if SESSION_MOVES_PATH.exists():
+        SESSION_MOVES_PATH.unlink()
+
+    return relocated
 
 
 def main():
@@ -179,12 +265,13 @@ def main():
     print("=" * 60)
     print()
 
-    # Load session analysis from reader
-    if not SESSION_ANALYSIS_PATH.exists():
-        print("No session-analysis.json found. Run reader.py first.")
+    # Load this machine's session analysis from reader
+    analysis_path = own_shard(SESSION_ANALYSIS_PATH)
+    if not analysis_path.exists():
+        print(f"No {analysis_path.name} found. Run reader.py first.")
         return
 
-    with open(SESSION_ANALYSIS_PATH) as f:
+    with open(analysis_path) as f:
         raw_data = json.load(f)
 
     # Handle both list format (new) and dict format (old)
@@ -203,6 +290,7 @@ def main():
                 "first_user_message": info.get("first_user_message"),
                 "files_touched": info.get("files_touched", []),
                 "tools_used": info.get("tools_used", []),
+                "agents": info.get("agents", []),
                 "project": classification.get("project"),
                 "vault": classification.get("vault"),
             }
@@ -213,10 +301,16 @@ def main():
 
     print(f"Found {len(sessions)} total sessions")
 
-    # Load already-processed sessions
+    # Load already-processed sessions (from every machine)
     processed = load_processed_sessions()
+    appended = set()
     print(f"Already processed: {len(processed)} sessions")
 
+    # Relocate entries of sessions that reader.py re-classified
+    relocated = relocate_moved_sessions(processed)
+    if relocated:
+        print(f"Relocated {relocated} re-classified sessions")
+
     # Find new sessions
     new_sessions = []
     for session in sessions:
@@ -225,6 +319,9 @@ def main():
             new_sessions.append(session)
 
     if not new_sessions:
+        save_blob_stores()
+        similarity.save_all()
+        refresh_bundles()
         print("\nNo new sessions to process.")
         return
 
@@ -235,39 +332,23 @@ def main():
         filepath = session.get("filepath", "")
         session_id = session.get("session_id", "unknown")
 
-        # Get project/vault from classification first, fallback to path detection
-        project = session.get("project")
-        vault = session.get("vault")
-
-        # Skip UNCLEAR or None projects
-        if not project or project == "UNCLEAR":
-            project, vault = get_project_from_path(filepath)
+        # Project from classification first, fallback to path detection
+        # (topics.py files the session's topics under the same folder)
+        project_path = status.resolve_project_path(session.get("project"), session.get("vault"), filepath)
 
-        if not project or project == "UNCLEAR":
+        if project_path is None:
             print(f"  SKIP: {session_id[:8]}... (couldn't determine project)")
             continue
-
-        # Normalize vault
-        if not vault or vault not in ("work", "personal"):
-            vault = "work" if project.lower() in WORK_PROJECTS else "personal"
-
-        # Find project directory
-        project_path = GOLDFISH_PATH / vault / project.lower()
+        project_key = status.project_key(project_path)
 
         if not project_path.exists():
-            # Try the other vault
-            other_vault = "personal" if vault == "work" else "work"
-            alt_path = GOLDFISH_PATH / other_vault / project.lower()
-            if alt_path.exists():
-                project_path = alt_path
-                vault = other_vault
-            elif project.lower().startswith("no-category/"):
+            if project_key.split("/")[1:2] == ["no-category"]:
                 # Auto-create no-category subdirectories
                 project_path.mkdir(parents=True, exist_ok=True)
                 goldfish_dir = project_path / "goldfish"
                 goldfish_dir.mkdir(exist_ok=True)
                 # Create initial small.md
-                topic = project.split("/")[-1].replace("-", " ").title()
+                topic = project_path.name.replace("-", " ").title()
                 small_md = goldfish_dir / "small.md"
                 small_md.write_text(f"""# {topic}
 
@@ -282,28 +363,35 @@ If it becomes important, move it to a proper project folder.
 ---
 *"remember" = medium.md | "ultra remember" = large.md*
 """)
-                print(f"  CREATE: {vault}/{project.lower()}/")
+                print(f"  CREATE: {project_key}/")
             else:
                 print(f"  SKIP: {session_id[:8]}... (project dir doesn't exist: {project_path})")
                 continue
 
-        print(f"  {session_id[:8]}... -> {vault}/{project.lower()}")
+        print(f"  {session_id[:8]}... -> {project_key}")
 
-        # Append to large.md
-        append_to_large_md(project_path, session)
+        # Append to large.md and index it for near-duplicate detection
+        entry = append_to_large_md(project_path, session)
+        similarity.add_session(project_path, session, entry)
 
         # Update inbox.md
         update_inbox(project_path, session)
 
         # Mark as processed
         processed.add(session_id)
+        appended.add(session_id)
+        TOUCHED_PROJECTS.add(project_path)
 
-    # Save processed list
-    save_processed_sessions(processed)
+    # Save processed list (blob references first, so a crash can't leave
+    # processed sessions pointing at unrecorded blobs)
+    save_blob_stores()
+    similarity.save_all()
+    save_processed_sessions(appended)
+    refresh_bundles()
 
     print()
     print(f"Appended {len(new_sessions)} sessions to large.md files")
-    print("Inbox.md files updated with NEEDS_PROCESSING flags")
+    print("Inbox shards flagged with NEEDS_PROCESSING sessions")
     print()
     print("Run /gfsave to generate quality summaries.")
 